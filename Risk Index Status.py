@@ -4,27 +4,16 @@ import dash_bootstrap_components as dbc
 from dash_bootstrap_components import Row
 from dash.dependencies import ALL
 import plotly.express as px
-import pandas as pd
-import io
-import base64
+
+from risk_core.parsing import parse_contents, parse_with_driver_index
+from risk_core.risk_index import determine_risk_indices, NOT_ASSESSED
+from instrumentation import instrument_app, stage
 
 app = Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP], suppress_callback_exceptions=True)
+instrument_app(app)
 
-# Function to parse contents of the uploaded file
-def parse_contents(contents):
-    content_type, content_string = contents.split(',')
-    decoded = base64.b64decode(content_string)
-    return pd.read_excel(io.BytesIO(decoded))
-
-# Function to determine risk index
-def determine_risk_index(status, threshold):
-    range_under_threshold = threshold * 0.10  # Allowing 10% range under the threshold
-    if status < threshold:
-        return 1  # Low Risk
-    elif threshold <= status <= (threshold + range_under_threshold):
-        return 2  # Approaching Risk
-    else:
-        return 3  # At Risk
+# Columns read from the uploaded workbook
+STATUS_COLUMNS = ['Risk Drivers', 'Sub Risk Drivers', 'Threshold', 'Unit']
 
 # Layout for the application
 app.layout = html.Div([
@@ -70,13 +59,10 @@ def update_status_input_form(contents):
     if contents is None:
         raise dash.exceptions.PreventUpdate
 
-    df = parse_contents(contents)
-    df.columns = [col.lower() for col in df.columns]
-
-    if 'risk drivers' not in df.columns:
+    dataset_key, df, driver_index = parse_with_driver_index(contents, STATUS_COLUMNS)
+    if 'Risk Drivers' not in df.columns:
         return html.Div("The uploaded file does not contain the required column 'Risk Drivers'.")
 
-    risk_driver_categories = df['risk drivers'].unique()
     children = []
     
     # Instructions text area
@@ -87,21 +73,21 @@ def update_status_input_form(contents):
         readOnly=True
     ))
 
-    for category in risk_driver_categories:
-        category_df = df[df['risk drivers'].str.lower() == category.lower()]
+    for position, (category, entries) in enumerate(driver_index.items()):
         inputs_list = []
-        for index, row in category_df.iterrows():
+        for entry in entries:
             sub_driver_div = html.Div([
                 html.Div([
-                    html.P(row['sub risk drivers'], style={'fontWeight': 'bold'}),
+                    html.P(entry['sub_driver'], style={'fontWeight': 'bold'}),
                     dcc.Input(
-                        id={'type': 'status-input', 'index': row['sub risk drivers']},
+                        # Indexed by row position so statuses map back to their rows in any layout order
+                        id={'type': 'status-input', 'index': entry['row']},
                         type='number',
                         placeholder='Enter Status',
                         style={'width': '100px', 'marginRight': '10px'}
                     ),
                     html.Div([
-                        html.Span(f"Threshold: {row['threshold']} {row['unit']}")
+                        html.Span(f"Threshold: {entry['threshold']} {entry['unit']}")
                     ], style={'fontSize': 'smaller'})
                 ], style={'border': '1px solid lightgrey', 'padding': '10px', 'marginRight': '20px', 'width': '500px'})
             ], style={'display': 'inline-block', 'verticalAlign': 'top', 'marginRight': '20px'})
@@ -112,7 +98,7 @@ def update_status_input_form(contents):
             html.Div(inputs_list, style={'marginBottom': '20px'})
         ]))
         # Add horizontal line between categories
-        if category != risk_driver_categories[-1]:  # Avoid adding a line after the last category
+        if position < len(driver_index) - 1:  # Avoid adding a line after the last category
             children.append(html.Hr(style={'margin': '20px 0'}))
 
     return children
@@ -122,31 +108,37 @@ def update_status_input_form(contents):
     [Output('graph-container', 'children'), Output('risk-summary-container', 'children')],
     Input('analyze-button', 'n_clicks'),
     State('upload-data', 'contents'),
-    State({'type': 'status-input', 'index': ALL}, 'value')
+    State({'type': 'status-input', 'index': ALL}, 'value'),
+    State({'type': 'status-input', 'index': ALL}, 'id')
 )
-def analyze_risk(n_clicks, contents, status_values):
+def analyze_risk(n_clicks, contents, status_values, status_ids):
     if n_clicks == 0 or contents is None:
         return html.Div(), html.Div()
 
-    df = parse_contents(contents)
-    df['Status'] = status_values
-    df['Risk Index'] = df.apply(lambda x: determine_risk_index(x['Status'], x['Threshold']), axis=1)
+    df = parse_contents(contents, STATUS_COLUMNS)
+    statuses = [None] * len(df)
+    for status_id, value in zip(status_ids, status_values):
+        statuses[status_id['index']] = value
+    df['Status'] = statuses
+    with stage('risk index'):
+        df['Risk Index'] = determine_risk_indices(df['Status'], df['Threshold'])
 
     # Sorting the DataFrame by 'Risk Index'
     df.sort_values('Risk Index', ascending=False, inplace=True)
 
     # Mapping of risk index to colors
-    risk_colors = {1: 'green', 2: 'yellow', 3: 'red'}
+    risk_colors = {NOT_ASSESSED: 'lightgrey', 1: 'green', 2: 'yellow', 3: 'red'}
 
     # Creating the figure
-    fig = px.bar(
-        df,
-        x='Sub Risk Drivers',
-        y='Risk Index',
-        color='Risk Index',
-        color_discrete_map=risk_colors
-    )
-    fig.update_layout(yaxis=dict(range=[0, 4]))
+    with stage('figures'):
+        fig = px.bar(
+            df,
+            x='Sub Risk Drivers',
+            y='Risk Index',
+            color='Risk Index',
+            color_discrete_map=risk_colors
+        )
+        fig.update_layout(yaxis=dict(range=[0, 4]))
 
     # Preparing the summary
     summary = {
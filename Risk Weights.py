@@ -1,54 +1,121 @@
 import dash
-from dash import Dash, dcc, html, Input, Output, State, ALL
+from dash import Dash, dcc, html, Input, Output, State, ALL, MATCH
 import dash_bootstrap_components as dbc
-import plotly.express as px
 import numpy as np
-import pandas as pd
-import io
-import base64
 import json
 import plotly.graph_objs as go
+import hashlib
+import threading
+from collections import OrderedDict
+from itertools import combinations
+
+from risk_core.parsing import parse_contents, parse_with_driver_index
+from figures import bar_figure, pie_figure
+from mitigation import mitigation_components
+from instrumentation import instrument_app, stage
+from background import background_callback, progress_bar, cancel_button
+from risk_core.ahp import priority_vectors_frame, priority_vectors_from_groups, reciprocal_matrix, pairwise_priority, MAX_CONSISTENCY_RATIO
 
 app = Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
+instrument_app(app)
 
-# Function to parse contents of the uploaded file
-def parse_contents(contents):
-    content_type, content_string = contents.split(',')
-    decoded = base64.b64decode(content_string)
-    return pd.read_excel(io.BytesIO(decoded))
+# Columns read from the uploaded workbook
+WEIGHTS_COLUMNS = ['Risk Drivers', 'Sub Risk Drivers']
 
-# Function to calculate priority vector from pairwise matrix
-def calculate_priority_vector(matrix):
-    eigvals, eigvecs = np.linalg.eig(matrix)
-    max_index = eigvals.argmax()
-    priority_vector = np.abs(eigvecs[:, max_index])
-    priority_vector /= priority_vector.sum()
-    return priority_vector
+# Marks of the 1-9 importance sliders
+SLIDER_MARKS = {i: str(i) for i in range(10)}
+
+# Saaty scale marks of the pairwise sliders, negative positions favour the second sub-driver
+PAIRWISE_MARKS = {i: str(abs(i) + 1) for i in range(-8, 9, 2)}
+
+# Above this many sliders, driver groups start collapsed and their sliders are only built when opened
+LAZY_SLIDER_THRESHOLD = 60
+
+# Maximum number of driver priority vectors kept to warm start the pairwise solver
+PRIORITY_CACHE_SIZE = 256
+
+# Priority vectors from previous pairwise renders keyed by driver and sub-drivers, oldest first
+previous_priority_vectors = OrderedDict()
+_priority_vectors_lock = threading.Lock()
+
+# Maximum number of rendered driver cards kept for reuse across renders
+CARD_CACHE_SIZE = 256
+
+# Rendered driver cards keyed by dataset hash, driver, input mode and slider values, oldest first
+_card_cache = OrderedDict()
+_card_cache_lock = threading.Lock()
+
+# Function to convert a pairwise slider position into a Saaty judgement
+def pairwise_judgement(position):
+    return position + 1 if position >= 0 else 1 / (1 - position)
+
+# Function to create the bar and pie charts of one risk driver
+def create_driver_charts(risk_driver, sub_drivers, pv):
+    bar_fig = bar_figure(sub_drivers, pv, f'Risk Index - {risk_driver}', 'Sub Risk Drivers', 'Risk Index', yaxis={'range': [0, 1]})
+    pie_fig = pie_figure(pv, sub_drivers, f'Priority Vector - {risk_driver}', 'PV', 'Sub Risk Drivers')
+
+    return {'bar_fig': bar_fig, 'pie_fig': pie_fig}
 
 # Function to create bar and pie charts
 def create_charts(df, slider_values_dict):
     charts_dict = {}
-    for risk_driver, group_df in df.groupby('Risk Drivers'):
-        sliders = [slider_values_dict.get(f"{risk_driver}-{x}", 1) for x in group_df['Sub Risk Drivers']]
-        matrix = np.array([[sliders[i]/sliders[j] for j in range(len(sliders))] for i in range(len(sliders))])
-        pv = calculate_priority_vector(matrix)
-
-        bar_data = pd.DataFrame({
-            'Sub Risk Drivers': group_df['Sub Risk Drivers'],
-            'Risk Index': pv
-        })
-        bar_fig = px.bar(bar_data, x='Sub Risk Drivers', y='Risk Index', title=f'Risk Index - {risk_driver}')
-        bar_fig.update_layout(yaxis=dict(range=[0, 1]))
-
-        pie_data = pd.DataFrame({
-            'Sub Risk Drivers': group_df['Sub Risk Drivers'],
-            'PV': pv
-        })
-        pie_fig = px.pie(pie_data, values='PV', names='Sub Risk Drivers', title=f'Priority Vector - {risk_driver}')
-
-        charts_dict[risk_driver] = {'bar_fig': bar_fig, 'pie_fig': pie_fig}
+    # Priority vectors of every risk driver, solved in one batched call
+    pv_df = priority_vectors_frame(df, slider_values_dict)
+    for risk_driver, group_df in pv_df.groupby('Risk Drivers', sort=False):
+        charts_dict[risk_driver] = create_driver_charts(risk_driver, group_df['Sub Risk Drivers'], group_df['PV'])
     return charts_dict
 
+# Function to create the bar and pie charts of one risk driver from pairwise judgements, with their consistency
+def create_pairwise_charts(risk_driver, sub_drivers, comparisons):
+    matrix = reciprocal_matrix(len(sub_drivers), comparisons)
+    key = (risk_driver, tuple(sub_drivers))
+    with _priority_vectors_lock:
+        start = previous_priority_vectors.get(key)
+    result = pairwise_priority(matrix, start=start)
+    with _priority_vectors_lock:
+        previous_priority_vectors[key] = result['pv']
+        previous_priority_vectors.move_to_end(key)
+        while len(previous_priority_vectors) > PRIORITY_CACHE_SIZE:
+            previous_priority_vectors.popitem(last=False)
+
+    charts = create_driver_charts(risk_driver, sub_drivers, result['pv'])
+    charts['consistency'] = result
+    return charts
+
+# Function to create one pairwise comparison slider per pair of sub-drivers
+def create_pairwise_sliders(driver, sub_drivers):
+    return [html.Div([
+        html.Label(f"{sub_drivers[i]} (left) vs {sub_drivers[j]} (right)"),
+        dcc.Slider(
+            id={'type': 'pairwise-slider', 'index': f"{driver}-{i}-{j}"},
+            min=-8,
+            max=8,
+            step=1,
+            value=0,
+            marks=PAIRWISE_MARKS
+        )
+    ]) for i, j in combinations(range(len(sub_drivers)), 2)]
+
+# Function to create the sliders of one risk driver for the selected input mode
+def create_driver_sliders(driver, sub_drivers, mode):
+    if mode == 'pairwise':
+        return create_pairwise_sliders(driver, sub_drivers)
+    return [html.Div([
+        html.Label(sub_driver),
+        dcc.Slider(
+            id={'type': 'dynamic-slider', 'index': f"{driver}-{sub_driver}"},
+            min=1,
+            max=9,
+            step=1,
+            value=1,
+            marks=SLIDER_MARKS
+        )
+    ]) for sub_driver in sub_drivers]
+
+# Function to count the sliders a driver group holds in the selected input mode
+def count_driver_sliders(size, mode):
+    return size * (size - 1) // 2 if mode == 'pairwise' else size
+
 TEXT_STYLE = {
     'textAlign': 'center',
     'color': '#191970',
@@ -81,6 +148,17 @@ app.layout = html.Div([
         multiple=False,
         style={'textAlign': 'center', 'padding': '20px'}
     ), 
+    dcc.RadioItems(
+        id='input-mode',
+        options=[
+            {'label': ' Rank each sub-risk driver', 'value': 'sliders'},
+            {'label': ' Compare sub-risk drivers pairwise', 'value': 'pairwise'}
+        ],
+        value='sliders',
+        inline=True,
+        inputStyle={'margin-left': '20px'},
+        style={'textAlign': 'center'}
+    ),
     
     html.Div( 
         'Rank the following sub-risk drivers in terms of their importance to your project, relative to one another:',
@@ -95,188 +173,216 @@ app.layout = html.Div([
         }
     ),html.Div(id='sliders-container', style=CONTENT_STYLE),
     html.Button('Render', id='render-button', style={'width': '100%', 'height': '50px', 'lineHeight': '50px', 'background-color': '#007BFF', 'color': 'white', 'border': 'none'}),
+    progress_bar('render-progress'),
+    cancel_button('cancel-render', 'Cancel Render'),
     html.Div(id='log', style={'whiteSpace': 'pre-line', 'margin': '10px',}),
     html.Div(id='graphs-container', style=CONTENT_STYLE),
+    dcc.Store(id='rendered-cards'),
     
 ], style={'max-width': '1800px', 'margin': '0 auto'})
 
 
 @app.callback(
-    Output('sliders-container', 'children'),
-    [Input('upload-data', 'contents')]
+    [Output('sliders-container', 'children'),
+     Output('graphs-container', 'children'),
+     Output('rendered-cards', 'data')],
+    [Input('upload-data', 'contents'),
+     Input('input-mode', 'value')]
 )
-def update_sliders(contents):
+def update_sliders(contents, mode):
     if contents:
-        df = parse_contents(contents)
+        dataset_key, df, driver_index = parse_with_driver_index(contents, WEIGHTS_COLUMNS)
+        # Large catalogues start collapsed, unopened groups keep their default values when rendering
+        slider_count = sum(count_driver_sliders(len(entries), mode) for entries in driver_index.values())
+        expanded = slider_count <= LAZY_SLIDER_THRESHOLD
+
         sliders = []
-        risk_drivers = df['Risk Drivers'].unique()
-        for driver in risk_drivers:
-            sub_drivers = df[df['Risk Drivers'] == driver]['Sub Risk Drivers']
-            sliders_for_driver = [html.Div([
-                html.Label(sub_driver),
-                dcc.Slider(
-                    id={'type': 'dynamic-slider', 'index': f"{driver}-{sub_driver}"},
-                    min=1,
-                    max=9,
-                    step=1,
-                    value=1,
-                    marks={i: str(i) for i in range(10)}
-                )
-            ]) for sub_driver in sub_drivers]
+        for driver, entries in driver_index.items():
+            sub_drivers = [entry['sub_driver'] for entry in entries]
             sliders.append(html.Div([
-                html.H3(driver),
-                html.Div(sliders_for_driver, style={'border': 'thin lightgrey solid', 'padding': '20px'})
+                html.H3(html.Span(driver, id={'type': 'driver-toggle', 'index': driver}, n_clicks=0, title='Show or hide sliders', style={'cursor': 'pointer'})),
+                html.Div(
+                    create_driver_sliders(driver, sub_drivers, mode) if expanded else [],
+                    id={'type': 'driver-sliders', 'index': driver},
+                    style={'border': 'thin lightgrey solid', 'padding': '20px', 'display': 'block' if expanded else 'none'}
+                )
             ]))
-        return sliders
-    return 'Please upload an Excel file'
+
+        # One card per driver, filled in by render_graphics
+        cards = [html.Div(id={'type': 'driver-card', 'index': driver}) for driver in driver_index]
+        return sliders, cards, {}
+    return 'Please upload an Excel file', html.Div('No data to display, please upload a file and render the graphs.'), {}
 
 @app.callback(
-    Output('graphs-container', 'children'),
+    [Output({'type': 'driver-sliders', 'index': MATCH}, 'children'),
+     Output({'type': 'driver-sliders', 'index': MATCH}, 'style')],
+    [Input({'type': 'driver-toggle', 'index': MATCH}, 'n_clicks')],
+    [State({'type': 'driver-toggle', 'index': MATCH}, 'id'),
+     State({'type': 'driver-sliders', 'index': MATCH}, 'children'),
+     State({'type': 'driver-sliders', 'index': MATCH}, 'style'),
+     State('upload-data', 'contents'),
+     State('input-mode', 'value')],
+    prevent_initial_call=True
+)
+def toggle_driver_sliders(n_clicks, toggle_id, children, style, contents, mode):
+    if not n_clicks or not contents:
+        raise dash.exceptions.PreventUpdate
+
+    # Sliders are built the first time a group is opened and then only hidden, so their values survive
+    if not children:
+        dataset_key, df, driver_index = parse_with_driver_index(contents, WEIGHTS_COLUMNS)
+        driver = toggle_id['index']
+        children = create_driver_sliders(driver, [entry['sub_driver'] for entry in driver_index.get(driver, [])], mode)
+        return children, dict(style, display='block')
+
+    return dash.no_update, dict(style, display='none' if style.get('display') != 'none' else 'block')
+
+# Function to create the summary card and graphs of one risk driver
+def create_driver_card(risk_driver, charts):
+    pie_data = charts['pie_fig']['data'][0]
+    max_value_index = np.argmax(pie_data['values'])
+    most_important_sub_driver = pie_data['labels'][max_value_index]
+    mitigation_strategy = mitigation_components(most_important_sub_driver)
+
+    # Report the consistency of pairwise judgements, if any were made
+    consistency_summary = []
+    if 'consistency' in charts:
+        consistency = charts['consistency']
+        consistency_summary.append(html.P(
+            f"λmax: {consistency['lambda_max']:.3f}, CI: {consistency['ci']:.3f}, CR: {consistency['cr']:.3f}",
+            style={'textAlign': 'center'}
+        ))
+        if consistency['cr'] > MAX_CONSISTENCY_RATIO:
+            consistency_summary.append(html.P(
+                f"Comparisons are inconsistent (CR above {MAX_CONSISTENCY_RATIO:.2f}), consider revising them.",
+                style={'textAlign': 'center', 'color': '#FF4136'}
+            ))
+
+    # Create the summary card for the current risk driver
+    summary_card = dbc.Card(
+        dbc.CardBody([
+            html.H4(f'Most important area for {risk_driver}:', style=CARD_TEXT_STYLE),
+            html.P(f"{most_important_sub_driver} (PV: {pie_data['values'][max_value_index]:.2f})", style=CARD_TEXT_STYLE),
+            *consistency_summary,
+            html.H4('Suggested Mitigation Strategy:', style=CARD_TEXT_STYLE),
+            *mitigation_strategy
+        ]),
+        style=CARD_STYLE
+    )
+
+    # Create the graph row for the current risk driver
+    graph_row = dbc.Row([
+        dbc.Col(dcc.Graph(figure=charts['bar_fig']), md=6),
+        dbc.Col(dcc.Graph(figure=charts['pie_fig']), md=6)
+    ], className='mb-4')
+
+    return html.Div([
+        html.H3(f'{risk_driver} Summary', style=TEXT_STYLE),
+        summary_card,
+        html.H3(f'{risk_driver} Graphics', style=TEXT_STYLE),
+        graph_row
+    ], style={'margin-bottom': '50px'})
+
+# Function to remember a rendered card, evicting the least recently used ones
+def cache_driver_card(card_key, card):
+    with _card_cache_lock:
+        _card_cache[card_key] = card
+        _card_cache.move_to_end(card_key)
+        while len(_card_cache) > CARD_CACHE_SIZE:
+            _card_cache.popitem(last=False)
+
+# Function to fetch a rendered card and mark it recently used, None when it is not cached
+def cached_driver_card(card_key):
+    with _card_cache_lock:
+        card = _card_cache.get(card_key)
+        if card is not None:
+            _card_cache.move_to_end(card_key)
+        return card
+
+# Cards are rendered as a background job when a manager is available, the card cache then lives in the job process
+@background_callback(
+    app,
+    [Output({'type': 'driver-card', 'index': ALL}, 'children'),
+     Output('rendered-cards', 'data', allow_duplicate=True)],
     [Input('render-button', 'n_clicks')],
     [State('upload-data', 'contents'),
+     State('input-mode', 'value'),
+     State({'type': 'driver-card', 'index': ALL}, 'id'),
+     State('rendered-cards', 'data'),
      State({'type': 'dynamic-slider', 'index': ALL}, 'value'),
-     State({'type': 'dynamic-slider', 'index': ALL}, 'id')]
+     State({'type': 'dynamic-slider', 'index': ALL}, 'id'),
+     State({'type': 'pairwise-slider', 'index': ALL}, 'value'),
+     State({'type': 'pairwise-slider', 'index': ALL}, 'id')],
+    progress=[Output('render-progress', 'value'), Output('render-progress', 'label')],
+    cancel=[Input('cancel-render', 'n_clicks')],
+    prevent_initial_call=True
 )
 
-def render_graphics(n_clicks, contents, slider_values, slider_ids):
-    if n_clicks and contents:
-        df = parse_contents(contents)
-        slider_values_dict = {slider['index']: value for slider, value in zip(slider_ids, slider_values)}
-        
-        # Create charts for each risk driver as per the order in the dataframe
-        charts_dict = create_charts(df, slider_values_dict)
-        
-        # Initialize a list to hold the Divs for summaries and graphs
-        divs = []
-
-        # Iterate through the charts_dict in the order of risk drivers
-        for risk_driver in df['Risk Drivers'].unique():
-            charts = charts_dict[risk_driver]
-            pie_data = charts['pie_fig'].data[0]
-            max_value_index = np.argmax(pie_data['values'])
-            most_important_sub_driver = pie_data['labels'][max_value_index]
-            mitigation_strategy = mitigation_strategies.get(most_important_sub_driver, [html.P('No specific mitigation strategy provided.')])
-
-            # Create the summary card for the current risk driver
-            summary_card = dbc.Card(
-                dbc.CardBody([
-                    html.H4(f'Most important area for {risk_driver}:', style=CARD_TEXT_STYLE),
-                    html.P(f"{most_important_sub_driver} (PV: {pie_data['values'][max_value_index]:.2f})", style=CARD_TEXT_STYLE),
-                    html.H4('Suggested Mitigation Strategy:', style=CARD_TEXT_STYLE),
-                    *mitigation_strategy
-                ]),
-                style=CARD_STYLE
-            )
-
-            # Create the graph row for the current risk driver
-            graph_row = dbc.Row([
-                dbc.Col(dcc.Graph(figure=charts['bar_fig']), md=6),
-                dbc.Col(dcc.Graph(figure=charts['pie_fig']), md=6)
-            ], className='mb-4')
-
-            # Append the summary card and graph row to the divs list
-            divs.append(html.Div([
-                html.H3(f'{risk_driver} Summary', style=TEXT_STYLE),
-                summary_card,
-                html.H3(f'{risk_driver} Graphics', style=TEXT_STYLE),
-                graph_row
-            ], style={'margin-bottom': '50px'}))
-
-        return divs
-
-    return html.Div('No data to display, please upload a file and render the graphs.')
-
-mitigation_strategies = {
-    # Process
-    'IT System Failures': [
-        html.P("Establish a comprehensive IT disaster recovery plan and conduct regular system backups."),
-        html.P("Implement redundant systems and high-availability solutions to minimize downtime."),
-    ],
-    'Technological Obsolescence': [
-        html.P("Schedule regular technology reviews and establish a replacement cycle aligned with industry standards."),
-        html.P("Invest in employee training on new technologies and foster a culture of continuous learning."),
-    ],
-    'Supplier Count Range': [
-        html.P("Conduct periodic reviews of supplier performance and diversify supplier base to mitigate risks."),
-        html.P("Develop strategic partnerships with key suppliers to ensure reliable supply chains."),
-    ],
-
-    # Organization Structure
-    'Labor Strikes': [
-        html.P("Foster a work environment that values employee feedback and promotes fair labor practices."),
-        html.P("Establish contingency plans to maintain operations during periods of labor unrest."),
-    ],
-    'Cost Overruns': [
-        html.P("Implement stringent budget controls and regular audit mechanisms."),
-        html.P("Adopt project management methodologies that emphasize cost control."),
-    ],
-
-    # Environment
-    'Environmental Regulations': [
-        html.P("Stay updated with regulatory changes and ensure compliance through regular audits."),
-        html.P("Invest in sustainable practices and technologies that exceed regulatory requirements."),
-    ],
-    'Natural Disasters': [
-        html.P("Develop and regularly update an emergency preparedness and response plan."),
-        html.P("Invest in insurance and infrastructure that can withstand environmental risks."),
-    ],
-    'Regulatory Changes': [
-        html.P("Engage with policymakers and industry associations to stay ahead of potential regulatory changes."),
-        html.P("Adopt flexible business strategies that can quickly adapt to new regulations."),
-    ],
-    'Global Pandemic': [
-        html.P("Create a pandemic response plan that includes remote working capabilities and health protocols."),
-        html.P("Maintain a reserve of essential supplies and diversify production locations to minimize disruptions."),
-    ],
-    'Market Demand Fluctuations': [
-        html.P("Use predictive analytics to understand market trends and adjust production accordingly."),
-        html.P("Diversify product offerings to cater to different market segments and reduce reliance on a single product."),
-    ],
-    'Currency Fluctuations': [
-        html.P("Use financial hedging instruments to manage risks related to currency exchange rates."),
-        html.P("Diversify revenue streams across different currencies to mitigate potential losses."),
-    ],
-
-    # Upstream
-    'Political Instability': [
-        html.P("Monitor political developments and have contingency plans for rapid response."),
-        html.P("Diversify operations across regions to mitigate the impact of political instability in any one area."),
-    ],
-    'Supplier Delays': [
-        html.P("Implement just-in-time inventory systems and establish backup suppliers."),
-        html.P("Strengthen supplier relationships and contracts to include delivery guarantees."),
-    ],
-    'Supply Chain Disruptions': [
-        html.P("Develop a resilient supply chain with multiple logistics options."),
-        html.P("Invest in supply chain visibility tools for real-time tracking of goods."),
-    ],
-    'Supplier Financial Instability': [
-        html.P("Perform regular financial assessments of suppliers and develop risk profiles."),
-        html.P("Secure alternative suppliers for critical components to reduce dependency."),
-    ],
-
-    # Downstream
-    'Baggage Handling System Failure': [
-        html.P("Conduct regular maintenance and simulations to ensure baggage system reliability."),
-        html.P("Invest in technology upgrades and staff training for efficient baggage handling operations."),
-    ],
-}
-
-
-
+def render_graphics(set_progress, n_clicks, contents, mode, card_ids, rendered_cards, slider_values, slider_ids, pairwise_values, pairwise_ids):
+    if not n_clicks or not contents:
+        raise dash.exceptions.PreventUpdate
+
+    dataset_key, df, driver_index = parse_with_driver_index(contents, WEIGHTS_COLUMNS)
+    rendered_cards = rendered_cards or {}
+
+    comparisons = {}
+    for pairwise_id, value in zip(pairwise_ids, pairwise_values):
+        driver, row, col = pairwise_id['index'].rsplit('-', 2)
+        comparisons.setdefault(driver, []).append((int(row), int(col), pairwise_judgement(value)))
+    slider_values_dict = {slider['index']: value for slider, value in zip(slider_ids, slider_values)}
+
+    cards = []
+    card_digests = {}
+    changed = []
+    for card_id in card_ids:
+        risk_driver = card_id['index']
+        sub_drivers = [entry['sub_driver'] for entry in driver_index.get(risk_driver, [])]
+        # Inputs in sub-driver order, groups that were never opened keep their defaults
+        if mode == 'pairwise':
+            inputs = tuple(sorted(comparisons.get(str(risk_driver), [])))
+        else:
+            inputs = tuple(slider_values_dict.get(f"{risk_driver}-{x}", 1) for x in sub_drivers)
+        card_key = (dataset_key, risk_driver, mode, inputs)
+        card_digests[str(risk_driver)] = hashlib.sha1(repr(card_key).encode()).hexdigest()
+
+        # The browser already shows this card for these inputs, so nothing is resent
+        if rendered_cards.get(str(risk_driver)) == card_digests[str(risk_driver)]:
+            cards.append(dash.no_update)
+            continue
+        cached_card = cached_driver_card(card_key)
+        if cached_card is not None:
+            cards.append(cached_card)
+        else:
+            changed.append((len(cards), risk_driver, sub_drivers, inputs, card_key))
+            cards.append(None)
+
+    # Only drivers whose inputs changed are recomputed, slider groups share one batched solve
+    with stage('figures'):
+        if mode == 'pairwise':
+            changed_charts = (create_pairwise_charts(risk_driver, sub_drivers, inputs) for _, risk_driver, sub_drivers, inputs, _ in changed)
+        else:
+            pvs = priority_vectors_from_groups([inputs for _, _, _, inputs, _ in changed])
+            changed_charts = (create_driver_charts(risk_driver, sub_drivers, pv) for (_, risk_driver, sub_drivers, _, _), pv in zip(changed, pvs))
+
+        for rendered, ((position, risk_driver, _, _, card_key), charts) in enumerate(zip(changed, changed_charts), start=1):
+            cards[position] = create_driver_card(risk_driver, charts)
+            cache_driver_card(card_key, cards[position])
+            set_progress((100 * rendered / len(changed), f"Rendered {rendered} of {len(changed)} drivers"))
+
+    return cards, card_digests
 
 
 def update_summary(n_clicks, contents, slider_values, slider_ids):
     if n_clicks and contents:
-        df = parse_contents(contents)
+        df = parse_contents(contents, WEIGHTS_COLUMNS)
         slider_values_dict = {slider['index']: value for slider, value in zip(slider_ids, slider_values)}
         charts_dict = create_charts(df, slider_values_dict)
         summary = []
         for risk_driver, charts in charts_dict.items():
-            pie_data = charts['pie_fig'].data[0]
+            pie_data = charts['pie_fig']['data'][0]
             max_value_index = np.argmax(pie_data['values'])
             most_important_sub_driver = pie_data['labels'][max_value_index]
-            mitigation_strategy = mitigation_strategies.get(most_important_sub_driver, 'No specific mitigation strategy provided.')
+            mitigation_strategy = mitigation_components(most_important_sub_driver)
 
             summary.append(html.Div([
     dbc.Card([
@@ -0,0 +1,87 @@
+# background.py
+# Opt-in background execution of the slow dashboard callbacks, enabled with RISK_VISUALIZER_BACKGROUND=1.
+# Jobs run in separate processes managed by Dash's DiskcacheManager (pip install "dash[diskcache]"), the browser
+# polls them for progress and can cancel them. Without the extra, callbacks keep running inside the request.
+import os
+import atexit
+import shutil
+import tempfile
+import logging
+import functools
+
+from dash import html
+import dash_bootstrap_components as dbc
+
+from datasets import private_directory
+
+logger = logging.getLogger(__name__)
+
+# Set RISK_VISUALIZER_BACKGROUND=1 to run the slow callbacks as background jobs
+BACKGROUND_REQUESTED = os.environ.get('RISK_VISUALIZER_BACKGROUND', '') not in ('', '0')
+
+# Directory holding the job queue, by default a private temporary directory removed when the server exits.
+# Uploaded datasets are shared with the jobs through datasets.DATASET_DIR
+BACKGROUND_DIR = os.environ.get('RISK_VISUALIZER_BACKGROUND_DIR')
+
+# Milliseconds between two polls of a running job by the browser
+BACKGROUND_INTERVAL = 500
+
+
+# Function to create the background callback manager, None when background execution is off or unavailable
+def _create_manager():
+    if not BACKGROUND_REQUESTED:
+        return None
+    try:
+        import diskcache
+        from dash import DiskcacheManager
+    except ImportError as error:
+        logger.warning("Background callbacks unavailable, running them in the request: %s", error)
+        return None
+    # The job queue holds pickled callback results, so it gets the same protection as the datasets
+    if BACKGROUND_DIR:
+        directory = private_directory(BACKGROUND_DIR)
+    else:
+        directory = tempfile.mkdtemp(prefix='risk-visualizer-background-')
+        atexit.register(shutil.rmtree, directory, ignore_errors=True)
+    return DiskcacheManager(diskcache.Cache(private_directory(os.path.join(directory, 'jobs'))))
+
+
+BACKGROUND_MANAGER = _create_manager()
+
+
+# Function standing in for set_progress when the callback runs in the request, there is no one to report to
+def _ignore_progress(progress):
+    pass
+
+
+# Function to register a callback as a background job with progress and cancellation when a manager is available,
+# or as a regular callback otherwise. Callbacks with progress outputs always receive set_progress as first argument.
+def background_callback(app, *args, progress=None, cancel=None, **kwargs):
+    if BACKGROUND_MANAGER is not None:
+        return app.callback(*args, background=True, manager=BACKGROUND_MANAGER, interval=BACKGROUND_INTERVAL,
+                            progress=progress, cancel=cancel, **kwargs)
+
+    register = app.callback(*args, **kwargs)
+    if progress is None:
+        return register
+
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*callback_args):
+            return function(_ignore_progress, *callback_args)
+        return register(wrapper)
+    return decorator
+
+
+# Function to build the progress bar of a background callback, nothing when callbacks run in the request
+def progress_bar(component_id):
+    if BACKGROUND_MANAGER is None:
+        return None
+    return dbc.Progress(id=component_id, value=0, label='', striped=True, animated=True, style={'margin': '10px 0'})
+
+
+# Function to build the button cancelling background callbacks, nothing when callbacks run in the request
+def cancel_button(component_id, label='Cancel'):
+    if BACKGROUND_MANAGER is None:
+        return None
+    return html.Button(label, id=component_id, className='btn btn-outline-secondary btn-sm')
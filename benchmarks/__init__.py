@@ -0,0 +1,2 @@
+# benchmarks
+# Benchmarks of the dashboard callbacks and figure construction, see bench_callbacks.py and bench_figures.py
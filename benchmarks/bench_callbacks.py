@@ -0,0 +1,140 @@
+# bench_callbacks.py
+# Times the dashboard callbacks on synthetic workbooks and saves the results as JSON, run from the repository root with:
+#   python -m benchmarks.bench_callbacks --stakeholders 20 --drivers 10 --sub-drivers 8
+# and compare against an earlier run with --compare benchmarks/results/<commit>.json
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+import importlib.util
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import make_stakeholders, to_upload
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+REPEAT = 5
+
+
+# Function to import a dashboard script by file name, the scripts are not importable modules because of their names
+def load_app(filename, module_name):
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(ROOT, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# Function to describe the commit being measured, with a marker when the tree has local changes
+def git_revision():
+    try:
+        revision = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+        return f"{revision}-dirty" if dirty else revision
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+# Function to time a callable, calling setup before every run so caches do not hide the cost being measured
+def measure(function, setup=None, repeat=REPEAT):
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return {'min': min(timings), 'median': float(np.median(timings)), 'max': max(timings), 'runs': repeat}
+
+
+def run(stakeholders=3, drivers=5, sub_drivers=4, rows=None, repeat=REPEAT, file_format='xlsx'):
+    from risk_core.parsing import parse_contents, clear_parse_cache
+    from risk_core.scoring import score_frame, cumulative_risk_index
+    weights_app = load_app('Risk Weights.py', 'risk_weights_app')
+    summary_app = load_app('summary.py', 'summary_app')
+
+    workbooks = make_stakeholders(stakeholders, drivers, sub_drivers, rows)
+    uploads = [to_upload(df, file_format) for df, _ in workbooks]
+    filenames = [filename.replace('.xlsx', f'.{file_format}') for _, filename in workbooks]
+    first_df = parse_contents(uploads[0])
+    slider_values = {f"{driver}-{sub_driver}": value for driver, sub_driver, value
+                     in zip(first_df['Risk Drivers'], first_df['Sub Risk Drivers'], np.arange(len(first_df)) % 9 + 1)}
+    stored_data = summary_app.process_data(uploads, filenames)
+
+    # Cold runs start from the registered datasets, as the first render after an upload does
+    def clear_summary_caches():
+        clear_parse_cache()
+        summary_app.cached_combined_frame.cache_clear()
+        summary_app.cached_heatmap.cache_clear()
+        summary_app.derived_dataset.cache_clear()
+
+    benchmarks = {
+        'parse_contents': (lambda: parse_contents(uploads[0]), clear_parse_cache),
+        'parse_contents (cached)': (lambda: parse_contents(uploads[0]), None),
+        'create_charts': (lambda: weights_app.create_charts(first_df, slider_values), None),
+        'calculate_cumulative_risk_index': (lambda: cumulative_risk_index(score_frame(first_df)), None),
+        'update_individual_assessments': (lambda: summary_app.update_individual_assessments(stored_data), clear_summary_caches),
+        'update_individual_assessments (cached)': (lambda: summary_app.update_individual_assessments(stored_data), None),
+        'update_master_chart': (lambda: summary_app.update_master_chart(stored_data), clear_summary_caches),
+        'update_master_chart (cached)': (lambda: summary_app.update_master_chart(stored_data), None)
+    }
+
+    results = {}
+    for name, (function, setup) in benchmarks.items():
+        results[name] = measure(function, setup, repeat)
+        print(f"{name:>40}: {results[name]['min'] * 1e3:10.2f} ms (median {results[name]['median'] * 1e3:.2f} ms)")
+
+    return {
+        'revision': git_revision(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'parameters': {'stakeholders': stakeholders, 'drivers': drivers, 'sub_drivers': sub_drivers,
+                       'rows': len(first_df), 'repeat': repeat, 'format': file_format},
+        'environment': {'python': platform.python_version(), 'pandas': pd.__version__, 'numpy': np.__version__,
+                        'platform': platform.platform()},
+        'results': results
+    }
+
+
+# Function to print how each benchmark changed against an earlier results file
+def compare(report, baseline_path):
+    with open(baseline_path, encoding='utf-8') as baseline_file:
+        baseline = json.load(baseline_file)
+    if baseline['parameters'] != report['parameters']:
+        print(f"Warning: {baseline_path} was measured with {baseline['parameters']}")
+    print(f"Compared with {baseline['revision']}:")
+    for name, timing in report['results'].items():
+        if name in baseline['results']:
+            ratio = timing['min'] / baseline['results'][name]['min']
+            print(f"{name:>40}: {ratio:6.2f}x {'slower' if ratio > 1 else 'faster'}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Time the dashboard callbacks on synthetic workbooks.')
+    parser.add_argument('--stakeholders', type=int, default=3, help='Number of workbooks uploaded to the summary dashboard.')
+    parser.add_argument('--drivers', type=int, default=5, help='Risk drivers per workbook.')
+    parser.add_argument('--sub-drivers', type=int, default=4, help='Sub risk drivers per risk driver.')
+    parser.add_argument('--rows', type=int, help='Rows per workbook (default: drivers x sub-drivers).')
+    parser.add_argument('--repeat', type=int, default=REPEAT, help='Runs per benchmark, the minimum is reported.')
+    parser.add_argument('--format', choices=['xlsx', 'csv'], default='xlsx', help='Format of the synthetic uploads.')
+    parser.add_argument('--out', help='Results file (default: benchmarks/results/<revision>.json).')
+    parser.add_argument('--compare', help='Earlier results file to compare against.')
+    args = parser.parse_args(argv)
+
+    report = run(args.stakeholders, args.drivers, args.sub_drivers, args.rows, args.repeat, args.format)
+    out = args.out or os.path.join(RESULTS_DIR, f"{report['revision']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w', encoding='utf-8') as out_file:
+        json.dump(report, out_file, indent=2)
+    print(f"Saved {out}")
+
+    if args.compare:
+        compare(report, args.compare)
+    return report
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
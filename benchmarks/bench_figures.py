@@ -0,0 +1,52 @@
+# bench_figures.py
+# Micro-benchmark of per-figure construction cost, run from the repository root with:
+#   python -m benchmarks.bench_figures
+import sys
+import time
+import timeit
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+from figures import bar_figure, pie_figure
+
+SUB_DRIVERS = 12
+REPEAT = 200
+
+
+# Function to build one driver's charts the way create_charts used to, through plotly.express
+def express_charts(sub_drivers, pv):
+    bar_fig = px.bar(pd.DataFrame({'Sub Risk Drivers': sub_drivers, 'Risk Index': pv}),
+                     x='Sub Risk Drivers', y='Risk Index', title='Risk Index - Driver')
+    bar_fig.update_layout(yaxis=dict(range=[0, 1]))
+    pie_fig = px.pie(pd.DataFrame({'Sub Risk Drivers': sub_drivers, 'PV': pv}),
+                     values='PV', names='Sub Risk Drivers', title='Priority Vector - Driver')
+    return bar_fig, pie_fig
+
+
+# Function to build one driver's charts through the figure factory
+def factory_charts(sub_drivers, pv):
+    bar_fig = bar_figure(sub_drivers, pv, 'Risk Index - Driver', 'Sub Risk Drivers', 'Risk Index', yaxis={'range': [0, 1]})
+    pie_fig = pie_figure(pv, sub_drivers, 'Priority Vector - Driver', 'PV', 'Sub Risk Drivers')
+    return bar_fig, pie_fig
+
+
+def main(repeat=REPEAT):
+    sub_drivers = np.array([f"Sub Driver {i}" for i in range(SUB_DRIVERS)], dtype=object)
+    pv = np.random.default_rng(0).random(SUB_DRIVERS)
+    pv /= pv.sum()
+
+    results = {}
+    for name, build in [('plotly.express', express_charts), ('figures', factory_charts)]:
+        build(sub_drivers, pv)  # warm up imports and the cached template
+        seconds = min(timeit.repeat(lambda: build(sub_drivers, pv), number=repeat, repeat=3, timer=time.perf_counter))
+        results[name] = seconds / (2 * repeat)
+        print(f"{name:>15}: {results[name] * 1e6:9.1f} us per figure")
+
+    print(f"{'speed-up':>15}: {results['plotly.express'] / results['figures']:9.1f}x")
+    return results
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else REPEAT)
@@ -0,0 +1,56 @@
+# synthetic.py
+# Generator of synthetic risk workbooks shaped like the HEATHROW files, for benchmarks of any size
+import io
+import base64
+
+import numpy as np
+import pandas as pd
+
+from risk_core.risk_index import determine_risk_indices
+
+# MIME types of the uploads built by to_upload, as the browser reports them
+UPLOAD_TYPES = {
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'csv': 'text/csv'
+}
+
+
+# Function to build one synthetic workbook, rows beyond drivers x sub-drivers repeat the sub-drivers
+def make_workbook(drivers=5, sub_drivers=4, rows=None, seed=0):
+    rng = np.random.default_rng(seed)
+    driver_names = np.repeat([f"Driver {driver}" for driver in range(drivers)], sub_drivers)
+    sub_driver_names = np.array([f"Sub Driver {driver}.{sub_driver}" for driver in range(drivers) for sub_driver in range(sub_drivers)])
+    rows = len(sub_driver_names) if rows is None else rows
+    positions = np.arange(rows) % len(sub_driver_names)
+
+    threshold = rng.integers(1, 100, len(sub_driver_names)).astype(float)[positions]
+    status = threshold * rng.uniform(0.5, 1.5, rows)
+    weight = rng.random(rows)
+    df = pd.DataFrame({
+        'Risk Drivers': driver_names[positions],
+        'Sub Risk Drivers': sub_driver_names[positions],
+        'Weight': weight.round(2),
+        'Risk Index': determine_risk_indices(status, threshold),
+        'Threshold': threshold,
+        'Unit': '% of budget',
+        'Status': status.round(2)
+    })
+    # Priority vectors of each driver's sub-drivers sum to one
+    df['PV'] = weight / pd.Series(weight).groupby(df['Risk Drivers'].to_numpy()).transform('sum').to_numpy()
+    return df
+
+
+# Function to build the workbooks of several stakeholders, each with its own weights and risk indices
+def make_stakeholders(stakeholders=3, drivers=5, sub_drivers=4, rows=None, seed=0):
+    return [(make_workbook(drivers, sub_drivers, rows, seed + stakeholder), f"stakeholder_{stakeholder:04d}.xlsx")
+            for stakeholder in range(stakeholders)]
+
+
+# Function to encode a workbook the way dcc.Upload hands it to the callbacks
+def to_upload(df, file_format='xlsx'):
+    buffer = io.BytesIO()
+    if file_format == 'xlsx':
+        df.to_excel(buffer, index=False)
+    else:
+        df.to_csv(buffer, index=False)
+    return f"data:{UPLOAD_TYPES[file_format]};base64,{base64.b64encode(buffer.getvalue()).decode()}"
@@ -0,0 +1,93 @@
+# datasets.py
+import os
+import atexit
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# Maximum number of datasets kept in process memory, the others are read back from DATASET_DIR
+DATASET_CACHE_SIZE = 64
+
+
+# Function to create a directory only the current user can use, refusing an existing one another user owns or can
+# write to: datasets are stored as pickles, so whoever can write there can run code in the dashboard
+def private_directory(path):
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    if hasattr(os, 'getuid'):
+        info = os.stat(path)
+        if info.st_uid != os.getuid() or info.st_mode & 0o022:
+            raise PermissionError(f"{path} must be owned by the current user and not writable by other users")
+    return path
+
+
+# Directory where every dataset is also written, so evicted datasets and other worker processes can read them.
+# Set RISK_VISUALIZER_DATASET_DIR to share it between server processes, by default it is a private temporary
+# directory removed when the server exits.
+DATASET_DIR = os.environ.get('RISK_VISUALIZER_DATASET_DIR')
+if DATASET_DIR:
+    private_directory(DATASET_DIR)
+else:
+    DATASET_DIR = tempfile.mkdtemp(prefix='risk-visualizer-datasets-')
+    atexit.register(shutil.rmtree, DATASET_DIR, ignore_errors=True)
+
+# Registered DataFrames keyed by dataset ID, oldest first
+_datasets = OrderedDict()
+_datasets_lock = threading.Lock()
+
+
+# Function to locate the on-disk copy of a dataset
+def _dataset_path(dataset_id):
+    return os.path.join(DATASET_DIR, f"{dataset_id}.pkl")
+
+
+# Function to register a DataFrame and return the ID the browser stores instead of its rows
+def register_dataset(df, dataset_id=None):
+    if dataset_id is None:
+        dataset_id = format(int(pd.util.hash_pandas_object(df).sum()) & 0xFFFFFFFFFFFFFFFF, '016x')
+
+    with _datasets_lock:
+        _datasets[dataset_id] = df
+        _datasets.move_to_end(dataset_id)
+        while len(_datasets) > DATASET_CACHE_SIZE:
+            _datasets.popitem(last=False)
+
+    path = _dataset_path(dataset_id)
+    if not os.path.exists(path):
+        private_directory(DATASET_DIR)
+        # Write then rename so readers never see a partially written file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        df.to_pickle(tmp_path)
+        os.replace(tmp_path, path)
+    return dataset_id
+
+
+# Function to fetch a registered dataset, raising KeyError once it has expired
+def get_dataset(dataset_id):
+    with _datasets_lock:
+        df = _datasets.get(dataset_id)
+        if df is not None:
+            _datasets.move_to_end(dataset_id)
+
+    if df is None:
+        if not os.path.exists(_dataset_path(dataset_id)):
+            raise KeyError(dataset_id)
+        private_directory(DATASET_DIR)
+        df = pd.read_pickle(_dataset_path(dataset_id))
+        with _datasets_lock:
+            _datasets[dataset_id] = df
+            while len(_datasets) > DATASET_CACHE_SIZE:
+                _datasets.popitem(last=False)
+
+    # Views add columns and sort in place, so never hand out the registered frame itself
+    return df.copy()
+
+
+# Function to check whether a dataset can still be fetched, without loading it
+def dataset_available(dataset_id):
+    with _datasets_lock:
+        if dataset_id in _datasets:
+            return True
+    return os.path.exists(_dataset_path(dataset_id))
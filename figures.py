@@ -0,0 +1,129 @@
+# figures.py
+from functools import lru_cache
+
+import numpy as np
+
+
+# Function to get the default Plotly template once, every figure shares the same dict
+@lru_cache(maxsize=1)
+def default_template():
+    import plotly.io as pio
+    return pio.templates[pio.templates.default].to_plotly_json()
+
+
+# Function to build the layout shared by the dashboard figures
+def base_layout(title, **layout):
+    return {
+        'template': default_template(),
+        'title': {'text': title},
+        'legend': {'tracegroupgap': 0},
+        **layout
+    }
+
+
+# Function to convert chart data into a plain array Plotly can serialize
+def as_array(values):
+    return values if isinstance(values, np.ndarray) else np.asarray(values)
+
+
+# Function to build a bar chart figure dict without going through plotly.express validation
+def bar_figure(x, y, title, x_title, y_title, marker_color='#636efa', **layout):
+    return {
+        'data': [{
+            'type': 'bar',
+            'x': as_array(x),
+            'y': as_array(y),
+            'marker': {'color': marker_color if isinstance(marker_color, str) else as_array(marker_color)},
+            'hovertemplate': f'{x_title}=%{{x}}<br>{y_title}=%{{y}}<extra></extra>',
+            'showlegend': False
+        }],
+        'layout': base_layout(
+            title,
+            xaxis={'title': {'text': x_title}, **layout.pop('xaxis', {})},
+            yaxis={'title': {'text': y_title}, **layout.pop('yaxis', {})},
+            **layout
+        )
+    }
+
+
+# Function to build a pie chart figure dict without going through plotly.express validation
+def pie_figure(values, labels, title, values_title, labels_title):
+    return {
+        'data': [{
+            'type': 'pie',
+            'values': as_array(values),
+            'labels': as_array(labels),
+            'hovertemplate': f'{labels_title}=%{{label}}<br>{values_title}=%{{value}}<extra></extra>'
+        }],
+        'layout': base_layout(title)
+    }
+
+
+# Function to build a grouped bar chart figure dict with one trace per (name, y, color)
+def grouped_bar_figure(x, series, title, x_title, y_title, legend_title):
+    x = as_array(x)
+    return {
+        'data': [{'type': 'bar', 'x': x, 'y': as_array(y), 'name': name, 'marker': {'color': color}} for name, y, color in series],
+        'layout': base_layout(
+            title,
+            barmode='group',
+            xaxis={'title': {'text': x_title}},
+            yaxis={'title': {'text': y_title}},
+            legend={'title': {'text': legend_title}, 'tracegroupgap': 0}
+        )
+    }
+
+
+# Function to build a heatmap figure dict, z is indexed [y, x] and empty cells are left blank
+def heatmap_figure(z, x, y, title, x_title, y_title, colorscale, hover_title='Risk Index', customdata=None):
+    trace = {
+        'type': 'heatmap',
+        'z': as_array(z),
+        'x': list(x),
+        'y': list(y),
+        'colorscale': [[position / (len(colorscale) - 1), color] for position, color in enumerate(colorscale)],
+        'hovertemplate': f'{x_title}=%{{x}}<br>{y_title}=%{{y}}<br>{hover_title}=%{{z}}<extra></extra>'
+    }
+    if customdata is not None:
+        trace['customdata'] = as_array(customdata)
+        trace['hovertemplate'] = trace['hovertemplate'].replace('<extra>', '<br>Assessments=%{customdata}<extra>')
+    return {
+        'data': [trace],
+        'layout': base_layout(
+            title,
+            xaxis={'title': {'text': x_title}, 'type': 'category'},
+            yaxis={'title': {'text': y_title}, 'type': 'category', 'autorange': 'reversed'}
+        )
+    }
+
+
+# Function to get the discrete colors of the default template, in the order Plotly assigns them to traces
+def default_colorway():
+    return default_template()['layout'].get('colorway', ['#636efa'])
+
+
+# Function to build a marker-only scatter trace dict, drawn with WebGL when gl is set
+def scatter_trace(x, y, marker, name=None, gl=False, **trace):
+    return {
+        'type': 'scattergl' if gl else 'scatter',
+        'mode': 'markers',
+        'x': as_array(x),
+        'y': as_array(y),
+        'marker': marker,
+        'name': name,
+        **trace
+    }
+
+
+# Function to build a scatter figure dict from scatter traces
+def scatter_figure(traces, title, x_title, y_title, legend_title=None, **layout):
+    return {
+        'data': traces,
+        'layout': base_layout(
+            title,
+            xaxis={'title': {'text': x_title}, **layout.pop('xaxis', {})},
+            yaxis={'title': {'text': y_title}, **layout.pop('yaxis', {})},
+            legend={'title': {'text': legend_title}, 'tracegroupgap': 0, 'itemsizing': 'constant'},
+            **layout
+        )
+    }
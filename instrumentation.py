@@ -0,0 +1,82 @@
+# instrumentation.py
+# Opt-in per-callback instrumentation of the Dash apps, enabled with RISK_VISUALIZER_INSTRUMENT=1.
+# Call instrument_app(app) right after creating the app, before its callbacks are declared.
+import time
+import functools
+
+from dash.exceptions import PreventUpdate
+
+from risk_core.instrumentation import (
+    INSTRUMENTATION_ENABLED, stage, record_call, recorded_calls, metrics_summary, slowest_profiles
+)
+
+# Path of the metrics endpoint added to instrumented apps
+METRICS_PATH = '/metrics'
+
+# Addresses allowed to read the metrics endpoint
+METRICS_ALLOWED_ADDRESSES = ('127.0.0.1', '::1')
+
+
+# Function to time the body of a callback as the 'callback' stage
+def _timed_body(function):
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        with stage('callback'):
+            return function(*args, **kwargs)
+    return wrapper
+
+
+# Function to record a dispatched callback, whose response is the serialized JSON sent to the browser.
+# PreventUpdate is how Dash skips an update, so it is not counted as an error.
+def _recorded_dispatch(name, dispatch):
+    @functools.wraps(dispatch)
+    def wrapper(*args, **kwargs):
+        with record_call(name, expected=PreventUpdate) as call:
+            start = time.perf_counter()
+            response = dispatch(*args, **kwargs)
+            # Everything outside the callback body is Dash's argument handling and JSON serialization
+            call['stages']['serialize'] = time.perf_counter() - start - call['stages'].get('callback', 0.0)
+            call['response_bytes'] = len(response.encode('utf-8') if isinstance(response, str) else response)
+        return response
+    wrapper._instrumented = True
+    return wrapper
+
+
+# Function to wrap every registered callback that is not recorded yet
+def _wrap_callback_map(app):
+    for name, entry in app.callback_map.items():
+        if not getattr(entry.get('callback'), '_instrumented', False):
+            entry['callback'] = _recorded_dispatch(name, entry['callback'])
+
+
+# Function to instrument every callback of a Dash app and serve its metrics, a no-op unless instrumentation is enabled
+def instrument_app(app):
+    if not INSTRUMENTATION_ENABLED:
+        return app
+    import flask
+
+    register_callback = app.callback
+
+    @functools.wraps(register_callback)
+    def callback(*args, **kwargs):
+        decorator = register_callback(*args, **kwargs)
+        return lambda function: decorator(_timed_body(function))
+
+    app.callback = callback
+
+    # Callbacks are wrapped on the first request, once every module has declared its callbacks
+    app.server.before_request(lambda: _wrap_callback_map(app))
+
+    @app.server.route(METRICS_PATH)
+    def metrics():
+        if flask.request.remote_addr not in METRICS_ALLOWED_ADDRESSES:
+            flask.abort(403)
+        calls = recorded_calls()
+        limit = flask.request.args.get('calls', default=100, type=int)
+        return flask.jsonify({
+            'summary': metrics_summary(),
+            'slowest_profiles': slowest_profiles(),
+            'calls': calls[-limit:] if limit > 0 else []
+        })
+
+    return app
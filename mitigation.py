@@ -1,133 +1,10 @@
-import dash
-from dash import html
+from risk_core.mitigation import find_strategies, MITIGATION_TOP_K, NO_STRATEGY
 
-mitigation_strategies = {
-    # Process
-    'IT System Failures': [
-        html.P("Establish a comprehensive IT disaster recovery plan and conduct regular system backups."),
-        html.P("Implement redundant systems and high-availability solutions to minimize downtime."),
-    ],
-    'Technological Obsolescence': [
-        html.P("Schedule regular technology reviews and establish a replacement cycle aligned with industry standards."),
-        html.P("Invest in employee training on new technologies and foster a culture of continuous learning."),
-    ],
-    'Supplier Count Range': [
-        html.P("Conduct periodic reviews of supplier performance and diversify supplier base to mitigate risks."),
-        html.P("Develop strategic partnerships with key suppliers to ensure reliable supply chains."),
-    ],
 
-    # Organization Structure
-    'Labor Strikes': [
-        html.P("Foster a work environment that values employee feedback and promotes fair labor practices."),
-        html.P("Establish contingency plans to maintain operations during periods of labor unrest."),
-    ],
-    'Cost Overruns': [
-        html.P("Implement stringent budget controls and regular audit mechanisms."),
-        html.P("Adopt project management methodologies that emphasize cost control."),
-    ],
-
-    # Environment
-    'Environmental Regulations': [
-        html.P("Stay updated with regulatory changes and ensure compliance through regular audits."),
-        html.P("Invest in sustainable practices and technologies that exceed regulatory requirements."),
-    ],
-    'Natural Disasters': [
-        html.P("Develop and regularly update an emergency preparedness and response plan."),
-        html.P("Invest in insurance and infrastructure that can withstand environmental risks."),
-    ],
-    'Regulatory Changes': [
-        html.P("Engage with policymakers and industry associations to stay ahead of potential regulatory changes."),
-        html.P("Adopt flexible business strategies that can quickly adapt to new regulations."),
-    ],
-    'Global Pandemic': [
-        html.P("Create a pandemic response plan that includes remote working capabilities and health protocols."),
-        html.P("Maintain a reserve of essential supplies and diversify production locations to minimize disruptions."),
-    ],
-    'Market Demand Fluctuations': [
-        html.P("Use predictive analytics to understand market trends and adjust production accordingly."),
-        html.P("Diversify product offerings to cater to different market segments and reduce reliance on a single product."),
-    ],
-    'Currency Fluctuations': [
-        html.P("Use financial hedging instruments to manage risks related to currency exchange rates."),
-        html.P("Diversify revenue streams across different currencies to mitigate potential losses."),
-    ],
-
-    # Upstream
-    'Political Instability': [
-        html.P("Monitor political developments and have contingency plans for rapid response."),
-        html.P("Diversify operations across regions to mitigate the impact of political instability in any one area."),
-    ],
-    'Supplier Delays': [
-        html.P("Implement just-in-time inventory systems and establish backup suppliers."),
-        html.P("Strengthen supplier relationships and contracts to include delivery guarantees."),
-    ],
-    'Supply Chain Disruptions': [
-        html.P("Develop a resilient supply chain with multiple logistics options."),
-        html.P("Invest in supply chain visibility tools for real-time tracking of goods."),
-    ],
-    'Supplier Financial Instability': [
-        html.P("Perform regular financial assessments of suppliers and develop risk profiles."),
-        html.P("Secure alternative suppliers for critical components to reduce dependency."),
-    ],
-
-    # Additional Mitigation Strategies
-    # Process
-    'Project Testing and Training': [
-        html.P("Implement robust testing protocols throughout the project lifecycle to identify and address potential issues early on."),
-        html.P("Provide comprehensive training programs for project teams to ensure competency in project management methodologies and tools."),
-    ],
-    'Software Engineering Resources': [
-        html.P("Regularly assess and forecast resource requirements to avoid shortages or overloads."),
-        html.P("Invest in talent development programs to nurture a skilled software engineering workforce and reduce reliance on external resources."),
-    ],
-
-    # Downstream
-    'Capital Expenditure Risk': [
-        html.P("Conduct thorough feasibility studies and risk assessments before committing to capital expenditures."),
-        html.P("Implement stringent project management practices to monitor and control capital expenditure budgets."),
-    ],
-    'Technology Investment Risk': [
-        html.P("Diversify technology investments across multiple platforms and vendors to mitigate the risk of technology obsolescence."),
-        html.P("Regularly evaluate the performance and alignment of technology investments with business objectives, adjusting strategies as needed."),
-    ],
-    'Operational Disruption Risk': [
-        html.P("Develop robust contingency plans and business continuity strategies to minimize the impact of operational disruptions."),
-        html.P("Invest in redundant systems and alternative operational pathways to ensure continuity of critical operations during disruptions."),
-    ],
-
-    # Organization Structure
-    'Project Management Complexity': [
-        html.P("Employ experienced project managers with a track record of successfully navigating complex projects."),
-        html.P("Utilize project management software and tools to streamline project workflows and communication channels."),
-    ],
-
-    # Environment
-    'Infrastructure Integration Risk': [
-        html.P("Conduct thorough compatibility assessments and pilot tests before integrating new infrastructure components into existing systems."),
-        html.P("Collaborate closely with infrastructure vendors and IT teams to ensure seamless integration and minimize disruption."),
-    ],
-
-    # Upstream
-    'Supplier Coordination Risk': [
-        html.P("Establish clear communication channels and performance metrics with suppliers to facilitate effective coordination."),
-        html.P("Leverage technology solutions such as supplier portals for real-time collaboration and information exchange."),
-    ],
-    'Capacity Expansion Risk': [
-        html.P("Adopt flexible manufacturing processes and scalable infrastructure to accommodate fluctuating demand."),
-        html.P("Diversify sourcing strategies to include multiple suppliers with varying production capacities."),
-    ],
-
-    # Technological Complexity
-    'IT System Integration Risk': [
-        html.P("Utilize standardized integration protocols and APIs to facilitate seamless communication between IT systems."),
-        html.P("Conduct rigorous testing and validation processes during system integration to identify and address potential compatibility issues."),
-    ],
-    'Technological Infrastructure Risk': [
-        html.P("Regularly assess the health and performance of technological infrastructure components, prioritizing upgrades and replacements as needed."),
-        html.P("Implement proactive monitoring and maintenance protocols to identify and mitigate potential infrastructure failures before they occur."),
-    ],
-    'Innovation and Change Management Risk': [
-        html.P("Cultivate a culture of innovation and change readiness within the organization through incentives, training, and recognition programs."),
-        html.P("Establish dedicated change management teams to facilitate smooth transitions during technological innovations and process changes."),
-    ],
-}
+# Function to create the components of the strategies displayed for a sub risk driver
+def mitigation_components(sub_driver, top_k=MITIGATION_TOP_K, component=None):
+    if component is None:
+        # Dash is only imported once a component is actually rendered
+        from dash import html
+        component = html.P
+    return [component(strategy) for strategy in find_strategies(sub_driver, top_k) or [NO_STRATEGY]]
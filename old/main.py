@@ -5,9 +5,11 @@ import dash_bootstrap_components as dbc
 
 from weights_tab import weights_tab_layout, update_sliders, render_graphics
 from risk_index_tab import risk_index_tab_layout
+from instrumentation import instrument_app
 
 
 app = Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP], suppress_callback_exceptions=True)
+instrument_app(app)
 
 
 app.layout = html.Div([
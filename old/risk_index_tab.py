@@ -5,31 +5,22 @@ import dash_bootstrap_components as dbc
 import plotly.express as px
 import numpy as np
 import pandas as pd
-from utils import parse_contents
-from mitigation import mitigation_strategies  # Ensure utils has the necessary functions
+from risk_core.parsing import parse_contents
 
 import dash
 from dash import dcc, html, Input, Output, callback
 import dash_bootstrap_components as dbc
 import plotly.express as px
 import pandas as pd
-from utils import parse_contents
-
-def determine_risk_index(status, threshold):
-    range_under_threshold = threshold * 0.10
-    if status < threshold:
-        return 1  # Low Risk
-    elif threshold <= status <= (threshold + range_under_threshold):
-        return 2  # Approaching Risk
-    else:
-        return 3  # High Risk
+from risk_core.parsing import parse_contents
+from risk_core.risk_index import determine_risk_indices
 
 def process_risk_index(data):
     # Additional data processing can be added here
     return data
 
 def calculate_cumulative_risk_index(df):
-    df['Risk Index'] = df.apply(lambda row: determine_risk_index(row['Status'], row['Threshold']), axis=1)
+    df['Risk Index'] = determine_risk_indices(df['Status'], df['Threshold'])
     weighted_risk_indices = {}
 
     for risk_driver, group in df.groupby('Risk Drivers'):
@@ -1,6 +1,5 @@
 # weights_mitigations.py
 import numpy as np
-import plotly.express as px
 import pandas as pd
 
 def calculate_priority_vector(matrix):
@@ -11,6 +10,8 @@ def calculate_priority_vector(matrix):
     return priority_vector
 
 def create_charts(df, slider_values_dict):
+    # Plotly is only needed for the charts, calculate_priority_vector stays importable without it
+    import plotly.express as px
     charts_dict = {}
     for risk_driver, group_df in df.groupby('risk_drivers'):
         sliders = [slider_values_dict.get(f"{risk_driver}-{x}", 1) for x in group_df['sub_risk_drivers']]
@@ -4,25 +4,17 @@ import dash_bootstrap_components as dbc
 import plotly.express as px
 import numpy as np
 import pandas as pd
-from utils import parse_contents
-from mitigation import mitigation_strategies
+from risk_core.parsing import parse_contents
+from risk_core.ahp import priority_vectors_frame
 
 
-# Function to calculate priority vector from pairwise matrix
-def calculate_priority_vector(matrix):
-    eigvals, eigvecs = np.linalg.eig(matrix)
-    max_index = eigvals.argmax()
-    priority_vector = np.abs(eigvecs[:, max_index])
-    priority_vector /= priority_vector.sum()
-    return priority_vector
-
 # Function to create bar and pie charts
 def create_charts(df, slider_values_dict):
     charts_dict = {}
-    for risk_driver, group_df in df.groupby('Risk Drivers'):
-        sliders = [slider_values_dict.get(f"{risk_driver}-{x}", 1) for x in group_df['Sub Risk Drivers']]
-        matrix = np.array([[sliders[i]/sliders[j] for j in range(len(sliders))] for i in range(len(sliders))])
-        pv = calculate_priority_vector(matrix)
+    # Priority vectors of every risk driver, solved in one batched call
+    pv_df = priority_vectors_frame(df, slider_values_dict)
+    for risk_driver, group_df in pv_df.groupby('Risk Drivers', sort=False):
+        pv = group_df['PV']
 
         bar_data = pd.DataFrame({
             'Sub Risk Drivers': group_df['Sub Risk Drivers'],
@@ -0,0 +1,19 @@
+# risk_core
+# Parsing, AHP, risk index and aggregation functions shared by the dashboards and the headless
+# scoring command. Nothing in this package imports Dash or Plotly, so worker processes and the
+# command line start without paying for the UI imports.
+from .parsing import (
+    KNOWN_COLUMNS, read_workbook, parse_upload, parse_contents, parse_with_driver_index, parse_uploads,
+    build_driver_index, parse_cache_info, clear_parse_cache
+)
+from .ahp import (
+    calculate_priority_vector, pairwise_priority, reciprocal_matrix, priority_vectors_frame,
+    priority_vectors_from_groups, MAX_CONSISTENCY_RATIO
+)
+from .risk_index import determine_risk_index, determine_risk_indices, NOT_ASSESSED, LOW_RISK, APPROACHING_RISK, AT_RISK
+from .scoring import (
+    score_frame, derive_dataset, score_workbook, cumulative_risk_index, overall_risk_scores, aggregate_weighted_risk, overall_std_comment
+)
+from .ranking import top_k_indices, top_k_rows, top_k_by, TOP_K
+from .streaming import WeightedRiskStats
+from .mitigation import find_strategies, NO_STRATEGY
@@ -0,0 +1,167 @@
+# ahp.py
+import numpy as np
+import pandas as pd
+
+# Relative tolerance used when deciding whether a pairwise matrix is perfectly consistent
+CONSISTENCY_RTOL = 1e-9
+
+# Convergence tolerance and iteration cap of the power iteration solver
+POWER_ITERATION_TOL = 1e-12
+POWER_ITERATION_MAX_ITER = 1000
+
+# Saaty's random consistency index by matrix size, larger matrices reuse the last value
+RANDOM_INDEX = [0.0, 0.0, 0.0, 0.58, 0.90, 1.12, 1.24, 1.32, 1.41, 1.45, 1.49, 1.51, 1.48, 1.56, 1.57, 1.59]
+
+# Consistency ratio above which pairwise judgements should be revised
+MAX_CONSISTENCY_RATIO = 0.10
+
+
+# Function to normalize weights so they sum to one
+def normalize(weights):
+    weights = np.asarray(weights, dtype=float)
+    return weights / weights.sum()
+
+
+# Function to check whether a pairwise matrix satisfies a_ij = w_i / w_j for some weights w
+def is_consistent(matrix, rtol=CONSISTENCY_RTOL):
+    matrix = np.asarray(matrix, dtype=float)
+    column = matrix[:, 0]
+    if not np.all(column > 0):
+        return False
+    return np.allclose(matrix, np.outer(column, 1.0 / column), rtol=rtol, atol=0.0)
+
+
+# Function to calculate priority vector from pairwise matrix with a full eigen decomposition
+def eigen_priority_vector(matrix):
+    eigvals, eigvecs = np.linalg.eig(matrix)
+    max_index = eigvals.real.argmax()
+    priority_vector = np.abs(eigvecs[:, max_index].real)
+    priority_vector /= priority_vector.sum()
+    return priority_vector
+
+
+# Function to calculate the Perron eigenvector and eigenvalue of a positive matrix by power iteration
+def perron_vector(matrix, start=None, tol=POWER_ITERATION_TOL, max_iter=POWER_ITERATION_MAX_ITER):
+    matrix = np.asarray(matrix, dtype=float)
+    size = len(matrix)
+    if start is not None and len(start) == size and np.all(np.asarray(start) > 0):
+        priority_vector = normalize(start)
+    else:
+        # The normalized row geometric mean is already close to the Perron vector
+        priority_vector = normalize(np.exp(np.log(matrix).mean(axis=1)))
+
+    for _ in range(max_iter):
+        product = matrix @ priority_vector
+        # With the iterate summing to one, the sum of A @ v converges to lambda max
+        lambda_max = product.sum()
+        product /= lambda_max
+        converged = np.abs(product - priority_vector).max() < tol
+        priority_vector = product
+        if converged:
+            return priority_vector, lambda_max
+
+    priority_vector = eigen_priority_vector(matrix)
+    return priority_vector, (matrix @ priority_vector).sum()
+
+
+# Function to calculate priority vector from pairwise matrix
+def calculate_priority_vector(matrix):
+    matrix = np.asarray(matrix, dtype=float)
+    # A consistent matrix is rank one, its principal eigenvector is any of its columns
+    if is_consistent(matrix):
+        return normalize(matrix[:, 0])
+    return perron_vector(matrix)[0]
+
+
+# Function to build a reciprocal pairwise matrix from (row, col, value) judgements of its upper triangle
+def reciprocal_matrix(size, comparisons):
+    matrix = np.ones((size, size))
+    for row, col, value in comparisons:
+        if value is None or not value > 0 or row == col or max(row, col) >= size:
+            continue
+        if row > col:
+            row, col, value = col, row, 1.0 / value
+        matrix[row, col] = value
+    rows, cols = np.triu_indices(size, k=1)
+    matrix[cols, rows] = 1.0 / matrix[rows, cols]
+    return matrix
+
+
+# Function to calculate the consistency index and ratio from lambda max
+def consistency_ratio(lambda_max, size):
+    if size < 3:
+        return 0.0, 0.0
+    consistency_index = (lambda_max - size) / (size - 1)
+    random_index = RANDOM_INDEX[min(size, len(RANDOM_INDEX) - 1)]
+    return consistency_index, consistency_index / random_index
+
+
+# Function to solve a pairwise matrix and report its priority vector, lambda max, CI and CR
+def pairwise_priority(matrix, start=None):
+    matrix = np.asarray(matrix, dtype=float)
+    size = len(matrix)
+    if is_consistent(matrix):
+        priority_vector, lambda_max = normalize(matrix[:, 0]), float(size)
+    else:
+        priority_vector, lambda_max = perron_vector(matrix, start=start)
+    consistency_index, ratio = consistency_ratio(lambda_max, size)
+    return {
+        'pv': priority_vector,
+        'lambda_max': float(lambda_max),
+        'ci': float(consistency_index),
+        'cr': float(ratio)
+    }
+
+
+# Function to pack grouped values into a padded (groups x largest group) array plus a validity mask
+def pad_groups(group_codes, values):
+    group_codes = np.asarray(group_codes, dtype=np.intp)
+    values = np.asarray(values, dtype=float)
+    counts = np.bincount(group_codes)
+    starts = np.cumsum(counts) - counts
+    order = np.argsort(group_codes, kind='stable')
+    positions = np.empty_like(group_codes)
+    positions[order] = np.arange(len(group_codes)) - np.repeat(starts, counts)
+
+    padded = np.zeros((len(counts), counts.max(initial=0)))
+    mask = np.zeros(padded.shape, dtype=bool)
+    padded[group_codes, positions] = values
+    mask[group_codes, positions] = True
+    return padded, mask, positions
+
+
+# Function to calculate the priority vectors of every padded slider group in one vectorised call
+def batch_priority_vectors(values, mask):
+    values = np.where(mask, np.asarray(values, dtype=float), 0.0)
+    totals = values.sum(axis=1, keepdims=True)
+    return np.divide(values, totals, out=np.zeros_like(values), where=totals > 0)
+
+
+# Function to calculate the priority vector of every risk driver as one tidy DataFrame
+def priority_vectors_frame(df, slider_values_dict, default=1):
+    df = df.dropna(subset=['Risk Drivers'])
+    drivers = df['Risk Drivers']
+    sub_drivers = df['Sub Risk Drivers']
+    keys = drivers.astype(str) + '-' + sub_drivers.astype(str)
+    sliders = keys.map(slider_values_dict).fillna(default).to_numpy(dtype=float)
+
+    group_codes, _ = pd.factorize(drivers)
+    padded, mask, positions = pad_groups(group_codes, sliders)
+    pv = batch_priority_vectors(padded, mask)
+
+    return pd.DataFrame({
+        'Risk Drivers': drivers.to_numpy(),
+        'Sub Risk Drivers': sub_drivers.to_numpy(),
+        'PV': pv[group_codes, positions]
+    })
+
+
+# Function to calculate the priority vectors of a list of slider groups in one vectorised call
+def priority_vectors_from_groups(groups):
+    if not groups:
+        return []
+    sizes = [len(group) for group in groups]
+    group_codes = np.repeat(np.arange(len(groups)), sizes)
+    padded, mask, _ = pad_groups(group_codes, np.concatenate([np.asarray(group, dtype=float) for group in groups]))
+    pv = batch_priority_vectors(padded, mask)
+    return [pv[position, :size] for position, size in enumerate(sizes)]
@@ -0,0 +1,98 @@
+# heatmap.py
+import numpy as np
+
+# Largest number of rows and columns sent to the browser, larger matrices are binned server-side
+HEATMAP_MAX_ROWS = 200
+HEATMAP_MAX_COLS = 200
+
+# Row orderings supported by the heatmap pipeline
+HEATMAP_ORDERS = ('none', 'mean', 'cluster')
+
+
+# Function to sum and count the valid values falling in each (row, column) cell of a shape without densifying the observations
+def cell_sums(row_codes, col_codes, values, shape):
+    row_codes = np.asarray(row_codes, dtype=np.intp)
+    col_codes = np.asarray(col_codes, dtype=np.intp)
+    values = np.asarray(values, dtype=float)
+    valid = (row_codes >= 0) & (col_codes >= 0) & ~np.isnan(values)
+    flat = row_codes[valid] * shape[1] + col_codes[valid]
+    size = shape[0] * shape[1]
+    total = np.bincount(flat, weights=values[valid], minlength=size).reshape(shape)
+    count = np.bincount(flat, minlength=size).reshape(shape)
+    return total, count
+
+
+# Function to divide cell sums by their counts, leaving cells without values empty
+def cell_means(total, count):
+    return np.divide(total, count, out=np.full(total.shape, np.nan), where=count > 0)
+
+
+# Function to split an ordering into at most max_bins contiguous bins of near-equal size
+def contiguous_bins(order, max_bins):
+    order = np.asarray(order, dtype=np.intp)
+    if len(order) <= max_bins:
+        return [order[position:position + 1] for position in range(len(order))]
+    return np.array_split(order, max_bins)
+
+
+# Function to map every code to the bin holding it
+def bin_lookup(bins, size):
+    lookup = np.full(size, -1, dtype=np.intp)
+    for position, members in enumerate(bins):
+        lookup[members] = position
+    return lookup
+
+
+# Function to label a bin by its only member, or by its first and last members and its size
+def bin_label(members, labels):
+    if len(members) == 1:
+        return str(labels[members[0]])
+    return f"{labels[members[0]]} … {labels[members[-1]]} ({len(members)})"
+
+
+# Function to order rows by their mean, or to cluster similar rows next to each other
+def order_rows(matrix, order='none'):
+    rows = len(matrix)
+    if order == 'none' or rows < 2:
+        return np.arange(rows)
+    with np.errstate(invalid='ignore'):
+        row_means = np.nanmean(np.where(np.isnan(matrix).all(axis=1, keepdims=True), 0.0, matrix), axis=1)
+    if order == 'mean':
+        return np.argsort(-row_means, kind='stable')
+    # Seriation on the leading principal component places rows with similar profiles next to each other
+    filled = np.where(np.isnan(matrix), np.nanmean(np.where(np.isnan(matrix).all(axis=0), 0.0, matrix), axis=0), matrix)
+    centred = filled - filled.mean(axis=0)
+    if not centred.any():
+        return np.argsort(-row_means, kind='stable')
+    leading = np.linalg.svd(centred, full_matrices=False)[0][:, 0]
+    # The sign of a singular vector is arbitrary, put the riskiest rows first
+    if np.corrcoef(leading, row_means)[0, 1] < 0:
+        leading = -leading
+    return np.argsort(-leading, kind='stable')
+
+
+# Function to build the (possibly binned) heatmap of a long table of row codes, column codes and values
+def build_heatmap(row_codes, col_codes, values, row_labels, col_labels, order='none',
+                  max_rows=HEATMAP_MAX_ROWS, max_cols=HEATMAP_MAX_COLS):
+    row_codes = np.asarray(row_codes, dtype=np.intp)
+    col_codes = np.asarray(col_codes, dtype=np.intp)
+    n_rows, n_cols = len(row_labels), len(col_labels)
+
+    # Columns keep their order and are binned first, so rows are only ever aggregated against the binned columns
+    col_bins = contiguous_bins(np.arange(n_cols), max_cols)
+    col_bin_codes = bin_lookup(col_bins, n_cols)[col_codes]
+    row_profile = cell_means(*cell_sums(row_codes, col_bin_codes, values, (n_rows, len(col_bins))))
+
+    row_bins = contiguous_bins(order_rows(row_profile, order), max_rows)
+    row_bin_codes = bin_lookup(row_bins, n_rows)[row_codes]
+    total, count = cell_sums(row_bin_codes, col_bin_codes, values, (len(row_bins), len(col_bins)))
+
+    return {
+        'z': cell_means(total, count),
+        'count': count,
+        'x': [bin_label(members, col_labels) for members in col_bins],
+        'y': [bin_label(members, row_labels) for members in row_bins],
+        'row_bins': row_bins,
+        'col_bins': col_bins,
+        'binned': len(row_bins) < n_rows or len(col_bins) < n_cols
+    }
@@ -0,0 +1,146 @@
+# instrumentation.py
+import os
+import time
+import heapq
+import cProfile
+import threading
+import itertools
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import numpy as np
+
+# Set RISK_VISUALIZER_INSTRUMENT=1 to record callback timings, everything here is a no-op otherwise
+INSTRUMENTATION_ENABLED = os.environ.get('RISK_VISUALIZER_INSTRUMENT', '') not in ('', '0')
+
+# Number of most recent calls kept in the ring buffer
+METRICS_BUFFER_SIZE = int(os.environ.get('RISK_VISUALIZER_METRICS_SIZE', 1000))
+
+# Number of slowest calls whose cProfile output is kept, 0 disables profiling
+PROFILE_SLOWEST = int(os.environ.get('RISK_VISUALIZER_PROFILE_SLOWEST', 0))
+PROFILE_DIR = os.environ.get('RISK_VISUALIZER_PROFILE_DIR', 'profiles')
+
+# Stage timings of the call being recorded in the current context, None outside recorded calls
+_current_stages = ContextVar('current_stages', default=None)
+
+_calls = deque(maxlen=METRICS_BUFFER_SIZE)
+_calls_lock = threading.Lock()
+
+# Min-heap of (seconds, sequence, path) of the slowest profiled calls
+_slowest_profiles = []
+_profiles_lock = threading.Lock()
+_profile_sequence = itertools.count()
+
+# cProfile cannot run in two threads at once, concurrent calls skip profiling instead of waiting
+_profiler_lock = threading.Lock()
+
+
+# Function to time a stage of the call being recorded, stages with the same name add up
+@contextmanager
+def stage(name):
+    stages = _current_stages.get()
+    if stages is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stages[name] = stages.get(name, 0.0) + time.perf_counter() - start
+
+
+# Function to keep the cProfile output of a call if it is among the PROFILE_SLOWEST slowest so far
+def _keep_profile(profiler, name, seconds):
+    with _profiles_lock:
+        if len(_slowest_profiles) >= PROFILE_SLOWEST and seconds <= _slowest_profiles[0][0]:
+            return None
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        safe_name = ''.join(character if character.isalnum() else '_' for character in name)[:80]
+        path = os.path.join(PROFILE_DIR, f"{safe_name}-{int(seconds * 1e3)}ms-{time.strftime('%Y%m%d-%H%M%S')}.prof")
+        profiler.dump_stats(path)
+        heapq.heappush(_slowest_profiles, (seconds, next(_profile_sequence), path))
+        if len(_slowest_profiles) > PROFILE_SLOWEST:
+            _, _, evicted = heapq.heappop(_slowest_profiles)
+            if os.path.exists(evicted):
+                os.remove(evicted)
+        return path
+
+
+# Function to record one call: its stage timings, total time, response size and profile.
+# Exceptions of the expected types are part of normal control flow and are not counted as errors.
+@contextmanager
+def record_call(name, expected=()):
+    if not INSTRUMENTATION_ENABLED:
+        yield None
+        return
+    call = {'callback': name, 'timestamp': time.time(), 'stages': {}, 'response_bytes': None, 'error': None, 'profile': None}
+    token = _current_stages.set(call['stages'])
+    profiler = cProfile.Profile() if PROFILE_SLOWEST > 0 and _profiler_lock.acquire(blocking=False) else None
+    start = time.perf_counter()
+    try:
+        if profiler is not None:
+            profiler.enable()
+        yield call
+    except expected:
+        raise
+    except Exception as error:
+        call['error'] = f"{type(error).__name__}: {error}"
+        raise
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            _profiler_lock.release()
+        call['seconds'] = time.perf_counter() - start
+        _current_stages.reset(token)
+        if profiler is not None:
+            call['profile'] = _keep_profile(profiler, name, call['seconds'])
+        with _calls_lock:
+            _calls.append(call)
+
+
+# Function to return the recorded calls, oldest first
+def recorded_calls():
+    with _calls_lock:
+        return list(_calls)
+
+
+# Function to summarise the recorded calls of each callback: count, latency percentiles and response size
+def metrics_summary():
+    by_callback = {}
+    for call in recorded_calls():
+        by_callback.setdefault(call['callback'], []).append(call)
+
+    summary = {}
+    for name, calls in by_callback.items():
+        seconds = np.array([call['seconds'] for call in calls])
+        sizes = [call['response_bytes'] for call in calls if call['response_bytes'] is not None]
+        stages = {}
+        for call in calls:
+            for stage_name, stage_seconds in call['stages'].items():
+                stages.setdefault(stage_name, []).append(stage_seconds)
+        summary[name] = {
+            'calls': len(calls),
+            'errors': sum(call['error'] is not None for call in calls),
+            'mean_ms': float(seconds.mean() * 1e3),
+            'p50_ms': float(np.percentile(seconds, 50) * 1e3),
+            'p95_ms': float(np.percentile(seconds, 95) * 1e3),
+            'max_ms': float(seconds.max() * 1e3),
+            'mean_response_bytes': float(np.mean(sizes)) if sizes else None,
+            'stages_mean_ms': {stage_name: float(np.mean(values) * 1e3) for stage_name, values in stages.items()}
+        }
+    return summary
+
+
+# Function to list the profile files of the slowest calls, slowest first
+def slowest_profiles():
+    with _profiles_lock:
+        return [{'seconds': seconds, 'path': path} for seconds, _, path in sorted(_slowest_profiles, reverse=True)]
+
+
+# Function to empty the ring buffer, profile files are left on disk
+def clear_metrics():
+    with _calls_lock:
+        _calls.clear()
+    with _profiles_lock:
+        _slowest_profiles.clear()
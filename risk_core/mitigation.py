@@ -0,0 +1,41 @@
+# mitigation.py
+import os
+import json
+import difflib
+from functools import lru_cache
+
+# Data file holding the mitigation strategy catalogue
+MITIGATION_CATALOGUE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'mitigation_strategies.json')
+
+# Number of strategies shown per sub risk driver
+MITIGATION_TOP_K = 2
+
+# Minimum similarity for a fuzzy match against the catalogue's sub risk driver names
+FUZZY_MATCH_CUTOFF = 0.85
+
+NO_STRATEGY = 'No specific mitigation strategy provided.'
+
+
+# Function to load the catalogue once, indexed by case-folded sub risk driver name
+@lru_cache(maxsize=1)
+def load_catalogue(path=MITIGATION_CATALOGUE):
+    with open(path, encoding='utf-8') as catalogue_file:
+        records = json.load(catalogue_file)
+    return {record['sub_risk_driver'].strip().casefold(): tuple(record['strategies']) for record in records}
+
+
+# Function to resolve a sub risk driver to its catalogue key, falling back to the closest name
+@lru_cache(maxsize=4096)
+def _resolve(key, fuzzy):
+    catalogue = load_catalogue()
+    if key in catalogue or not fuzzy:
+        return key
+    matches = difflib.get_close_matches(key, catalogue.keys(), n=1, cutoff=FUZZY_MATCH_CUTOFF)
+    return matches[0] if matches else None
+
+
+# Function to find the mitigation strategies of a sub risk driver, ignoring case and small typos
+def find_strategies(sub_driver, top_k=MITIGATION_TOP_K, fuzzy=True):
+    key = _resolve(str(sub_driver).strip().casefold(), fuzzy)
+    strategies = load_catalogue().get(key, ())
+    return list(strategies if top_k is None else strategies[:top_k])
@@ -0,0 +1,302 @@
+# parsing.py
+import pandas as pd
+import io
+import os
+import time
+import base64
+import hashlib
+import logging
+import threading
+import itertools
+import importlib.util
+from functools import lru_cache
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from .instrumentation import stage
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of parsed workbooks kept in the process-wide parse cache
+PARSE_CACHE_SIZE = 32
+
+# Columns read by the dashboards, in their canonical spelling
+KNOWN_COLUMNS = ('Risk Drivers', 'Sub Risk Drivers', 'Weight', 'Risk Index', 'Threshold', 'Unit', 'PV')
+_KNOWN_COLUMNS_BY_KEY = {column.lower(): column for column in KNOWN_COLUMNS}
+
+# Leading bytes of the supported binary upload formats, anything else is read as CSV
+EXCEL_SIGNATURES = (b'PK\x03\x04', b'\xd0\xcf\x11\xe0')
+PARQUET_SIGNATURE = b'PAR1'
+
+# Number of worker processes parsing multi-file uploads, 1 parses them on the calling thread
+INGEST_WORKERS = int(os.environ.get('RISK_VISUALIZER_INGEST_WORKERS', os.cpu_count() or 1))
+
+# Parsed workbooks keyed by the SHA-256 of the decoded upload and the projected columns, oldest first
+_parse_cache = OrderedDict()
+_parse_cache_lock = threading.Lock()
+_parse_cache_stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+# Driver indexes of cached workbooks, built on first use and evicted along with them
+_driver_indexes = {}
+
+# Process pool shared by every multi-file upload, created on first use
+_ingest_pool = None
+_ingest_pool_lock = threading.Lock()
+
+
+# Function to compute the cache key of a decoded upload
+def content_hash(decoded):
+    return hashlib.sha256(decoded).hexdigest()
+
+
+# Function to normalize a header to title case with spaces, keeping the canonical spelling of known columns
+@lru_cache(maxsize=1024)
+def normalize_column(name):
+    name = str(name).strip().replace('_', ' ')
+    return _KNOWN_COLUMNS_BY_KEY.get(name.lower(), name.title())
+
+
+# Function to pick the fastest installed Excel engine, None lets pandas choose openpyxl
+@lru_cache(maxsize=1)
+def excel_engine():
+    if importlib.util.find_spec('python_calamine') is not None:
+        return 'calamine'
+    return None
+
+
+# Function to read a decoded Excel, Parquet or CSV upload, keeping only the requested columns
+def read_workbook(decoded, columns=None):
+    wanted = None if columns is None else set(columns)
+    usecols = None if wanted is None else (lambda name: normalize_column(name) in wanted)
+
+    if decoded.startswith(EXCEL_SIGNATURES):
+        df = pd.read_excel(io.BytesIO(decoded), usecols=usecols, engine=excel_engine())
+    elif decoded.startswith(PARQUET_SIGNATURE):
+        df = pd.read_parquet(io.BytesIO(decoded))
+        if usecols is not None:
+            df = df[[name for name in df.columns if usecols(name)]]
+    else:
+        df = pd.read_csv(io.BytesIO(decoded), usecols=usecols)
+
+    df.columns = [normalize_column(name) for name in df.columns]
+    return df
+
+
+# Function to decode an upload and compute its cache key
+def decode_upload(contents):
+    with stage('decode'):
+        content_type, content_string = contents.split(',')
+        decoded = base64.b64decode(content_string)
+        return content_hash(decoded), decoded
+
+
+# Function to look up a parsed workbook, counting the hit or miss
+def _cache_get(key):
+    with _parse_cache_lock:
+        df = _parse_cache.get(key)
+        if df is not None:
+            _parse_cache.move_to_end(key)
+            _parse_cache_stats['hits'] += 1
+        else:
+            _parse_cache_stats['misses'] += 1
+    return df
+
+
+# Function to add a parsed workbook, evicting the least recently used ones
+def _cache_put(key, df):
+    with _parse_cache_lock:
+        _parse_cache[key] = df
+        _parse_cache.move_to_end(key)
+        while len(_parse_cache) > PARSE_CACHE_SIZE:
+            evicted_key, _ = _parse_cache.popitem(last=False)
+            _driver_indexes.pop(evicted_key, None)
+            _parse_cache_stats['evictions'] += 1
+
+
+# Function to build the parse cache key of an upload read with the given column projection
+def _cache_key(key, columns):
+    return key, None if columns is None else tuple(columns)
+
+
+# Function to fetch the cached frame of an upload, parsing it on a miss
+def _load_upload(contents, columns):
+    key, decoded = decode_upload(contents)
+    df = _cache_get(_cache_key(key, columns))
+    if df is None:
+        with stage('parse'):
+            df = read_workbook(decoded, columns)
+        _cache_put(_cache_key(key, columns), df)
+    return key, df
+
+
+# Function to parse an upload and return its content hash along with the DataFrame
+def parse_upload(contents, columns=None):
+    key, df = _load_upload(contents, columns)
+
+    # Callers add and overwrite columns, so never hand out the cached frame itself
+    return key, df.copy()
+
+
+def parse_contents(contents, columns=None):
+    return parse_upload(contents, columns)[1]
+
+
+# Function to map each risk driver to its ordered sub-drivers in a single pass over the frame
+def build_driver_index(df):
+    if not {'Risk Drivers', 'Sub Risk Drivers'}.issubset(df.columns):
+        return {}
+    thresholds = df['Threshold'] if 'Threshold' in df.columns else [None] * len(df)
+    units = df['Unit'] if 'Unit' in df.columns else [None] * len(df)
+    driver_index = {}
+    rows = zip(df['Risk Drivers'], df['Sub Risk Drivers'], thresholds, units)
+    for position, (driver, sub_driver, threshold, unit) in enumerate(rows):
+        if pd.isna(driver):
+            continue
+        driver_index.setdefault(driver, []).append({
+            'sub_driver': sub_driver,
+            'row': position,
+            'threshold': threshold,
+            'unit': unit
+        })
+    return driver_index
+
+
+# Function to parse an upload along with its driver index, both cached per upload
+def parse_with_driver_index(contents, columns=None):
+    key, df = _load_upload(contents, columns)
+    cache_key = _cache_key(key, columns)
+    with _parse_cache_lock:
+        driver_index = _driver_indexes.get(cache_key)
+    if driver_index is None:
+        driver_index = build_driver_index(df)
+        with _parse_cache_lock:
+            if cache_key in _parse_cache:
+                _driver_indexes[cache_key] = driver_index
+
+    # The index is shared between callbacks and must be treated as read-only
+    return key, df.copy(), driver_index
+
+
+# Function run in ingest workers to read one workbook and time it
+def _read_workbook_timed(decoded, columns=None):
+    start = time.perf_counter()
+    with stage('parse'):
+        df = read_workbook(decoded, columns)
+    return df, time.perf_counter() - start
+
+
+# Function to yield the keys of submitted parses as they finish, timing the wait as the parse stage
+def _completed_keys(futures):
+    keys = {future: key for key, future in futures.items()}
+    completed = as_completed(keys)
+    while True:
+        with stage('parse'):
+            future = next(completed, None)
+        if future is None:
+            return
+        yield keys[future]
+
+
+# Function to get the shared ingest process pool
+def _get_ingest_pool():
+    global _ingest_pool
+    with _ingest_pool_lock:
+        if _ingest_pool is None:
+            _ingest_pool = ProcessPoolExecutor(max_workers=INGEST_WORKERS)
+        return _ingest_pool
+
+
+# Function to discard the shared ingest pool after a worker died, so the next upload starts a new one
+def _reset_ingest_pool():
+    global _ingest_pool
+    with _ingest_pool_lock:
+        if _ingest_pool is not None:
+            _ingest_pool.shutdown(wait=False)
+        _ingest_pool = None
+
+
+# Function to parse many uploads concurrently, returning one report per upload in upload order.
+# on_parsed, if given, is called with the number of uploads done so far and the total as each parse finishes.
+def parse_uploads(list_of_contents, filenames=None, columns=None, max_workers=None, on_parsed=None):
+    max_workers = INGEST_WORKERS if max_workers is None else max_workers
+    filenames = filenames or [None] * len(list_of_contents)
+    reports = []
+    pending = {}
+
+    for contents, filename in zip(list_of_contents, filenames):
+        report = {'filename': filename, 'key': None, 'df': None, 'seconds': 0.0, 'cached': False, 'error': None}
+        reports.append(report)
+        try:
+            report['key'], decoded = decode_upload(contents)
+        except Exception as error:
+            report['error'] = f"Could not decode upload: {error}"
+            continue
+        df = _cache_get(_cache_key(report['key'], columns))
+        if df is not None:
+            report['df'], report['cached'] = df.copy(), True
+        else:
+            pending.setdefault(report['key'], (decoded, []))[1].append(report)
+
+    # Identical uploads are parsed once, and only cache misses go to the workers
+    futures = {}
+    own_pool = None
+    if max_workers > 1 and len(pending) > 1:
+        try:
+            if max_workers == INGEST_WORKERS:
+                pool = _get_ingest_pool()
+            else:
+                pool = own_pool = ProcessPoolExecutor(max_workers=max_workers)
+            futures = {key: pool.submit(_read_workbook_timed, decoded, columns) for key, (decoded, _) in pending.items()}
+        except Exception as error:
+            # Daemon processes and restricted environments cannot start workers, parse here instead
+            logger.warning("Parallel ingestion unavailable, parsing serially: %s", error)
+            futures = {}
+
+    # Cached and undecodable uploads are done already
+    done = len(reports) - sum(len(waiting) for _, waiting in pending.values())
+    if on_parsed is not None and done:
+        on_parsed(done, len(reports))
+    # Submitted parses are collected as they finish, the ones that were not submitted are parsed here afterwards
+    serial_keys = (key for key in pending if key not in futures)
+    for key in itertools.chain(_completed_keys(futures), serial_keys):
+        decoded, waiting = pending[key]
+        done += len(waiting)
+        try:
+            if key in futures:
+                try:
+                    df, seconds = futures[key].result()
+                except BrokenProcessPool:
+                    if own_pool is None:
+                        _reset_ingest_pool()
+                    df, seconds = _read_workbook_timed(decoded, columns)
+            else:
+                df, seconds = _read_workbook_timed(decoded, columns)
+        except Exception as error:
+            for report in waiting:
+                report['error'] = f"{type(error).__name__}: {error}"
+        else:
+            _cache_put(_cache_key(key, columns), df)
+            for report in waiting:
+                report['df'], report['seconds'] = df.copy(), seconds
+        if on_parsed is not None:
+            on_parsed(done, len(reports))
+
+    if own_pool is not None:
+        own_pool.shutdown()
+    return reports
+
+
+# Function to report parse cache hit/miss counters and current size
+def parse_cache_info():
+    with _parse_cache_lock:
+        return dict(_parse_cache_stats, size=len(_parse_cache), max_size=PARSE_CACHE_SIZE)
+
+
+# Function to drop every cached workbook and reset the counters
+def clear_parse_cache():
+    with _parse_cache_lock:
+        _parse_cache.clear()
+        _driver_indexes.clear()
+        for counter in _parse_cache_stats:
+            _parse_cache_stats[counter] = 0
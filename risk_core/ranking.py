@@ -0,0 +1,35 @@
+# ranking.py
+import numpy as np
+
+# Number of entries listed by the ranking panels
+TOP_K = 5
+
+
+# Function to find the positions of the k largest values in O(n), ordered like pandas' nlargest(keep='first')
+def top_k_indices(values, k=TOP_K):
+    values = np.asarray(values, dtype=float)
+    candidates = np.flatnonzero(~np.isnan(values))
+    if k <= 0:
+        return candidates[:0]
+    if len(candidates) > k:
+        # Partition around the k-th largest value, then keep every value above it and the earliest ties
+        kth = values[candidates[np.argpartition(-values[candidates], k - 1)[k - 1]]]
+        above = candidates[values[candidates] > kth]
+        ties = candidates[values[candidates] == kth][:k - len(above)]
+        candidates = np.concatenate([above, ties])
+    # Only the k survivors are sorted, largest first and earlier rows first among equal values
+    ranked = candidates[np.lexsort((candidates, -values[candidates]))]
+    if len(ranked) < k:
+        # Like nlargest, missing values fill the remaining places
+        ranked = np.concatenate([ranked, np.flatnonzero(np.isnan(values))[:k - len(ranked)]])
+    return ranked
+
+
+# Function to select the k rows of a frame with the largest values of a column
+def top_k_rows(df, column, k=TOP_K):
+    return df.iloc[top_k_indices(df[column].to_numpy(dtype=float, na_value=np.nan), k)]
+
+
+# Function to select the top k rows of a frame for several columns in one call
+def top_k_by(df, columns, k=TOP_K):
+    return {column: top_k_rows(df, column, k) for column in columns}
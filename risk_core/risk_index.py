@@ -0,0 +1,33 @@
+# risk_index.py
+import numpy as np
+import pandas as pd
+
+# Width of the approaching-risk band above the threshold, as a fraction of the threshold
+RISK_BAND = 0.10
+
+# Risk indices assigned to each classification
+NOT_ASSESSED = 0
+LOW_RISK = 1
+APPROACHING_RISK = 2
+AT_RISK = 3
+
+
+# Function to determine the risk index of every status/threshold pair in one pass
+def determine_risk_indices(status, threshold, band=RISK_BAND):
+    status = np.asarray(pd.to_numeric(status, errors='coerce'), dtype=float)
+    threshold = np.asarray(pd.to_numeric(threshold, errors='coerce'), dtype=float)
+
+    # Same band as the original per-row rule: a zero threshold only treats a status exactly at it as approaching risk,
+    # and a negative threshold has an empty band, so any status at or above it is at risk
+    upper = threshold * (1 + band)
+    conditions = [
+        np.isnan(status) | np.isnan(threshold),
+        status < threshold,
+        status <= upper
+    ]
+    return np.select(conditions, [NOT_ASSESSED, LOW_RISK, APPROACHING_RISK], default=AT_RISK)
+
+
+# Function to determine risk index
+def determine_risk_index(status, threshold, band=RISK_BAND):
+    return int(determine_risk_indices([status], [threshold], band)[0])
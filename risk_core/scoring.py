@@ -0,0 +1,90 @@
+# scoring.py
+import time
+
+import numpy as np
+import pandas as pd
+
+from .parsing import read_workbook, KNOWN_COLUMNS
+from .risk_index import determine_risk_indices
+from .streaming import WeightedRiskStats
+from .ranking import top_k_rows, TOP_K
+
+# Columns read from each scored workbook, Status is only needed to derive a missing Risk Index
+SCORING_COLUMNS = KNOWN_COLUMNS + ('Status', 'Current Status')
+
+# Upper bounds of the green and orange Weighted Risk bands, anything above is red
+WEIGHTED_RISK_BANDS = (1, 2)
+
+
+# Function to color each Weighted Risk by its band
+def weighted_risk_colors(weighted_risk):
+    weighted_risk = np.asarray(weighted_risk, dtype=float)
+    low, medium = WEIGHTED_RISK_BANDS
+    return np.select([weighted_risk <= low, weighted_risk <= medium], ['green', 'orange'], default='red')
+
+
+# Function to add the Risk Index, Weighted Risk and band color of every sub-driver of one workbook
+def score_frame(df):
+    df = df.copy()
+    status_column = next((column for column in ('Status', 'Current Status') if column in df.columns), None)
+    if 'Risk Index' not in df.columns and status_column and 'Threshold' in df.columns:
+        df['Risk Index'] = determine_risk_indices(df[status_column], df['Threshold'])
+    if {'Weight', 'Risk Index'}.issubset(df.columns):
+        df['Weighted Risk'] = df['Weight'] * df['Risk Index']
+        df['Color'] = weighted_risk_colors(df['Weighted Risk'])
+    return df
+
+
+# Function to calculate the PV-weighted risk index of every risk driver
+def cumulative_risk_index(df):
+    if not {'Risk Drivers', 'PV', 'Risk Index'}.issubset(df.columns):
+        return pd.Series(dtype=float, name='Cumulative Risk Index')
+    products = df['PV'] * df['Risk Index']
+    return products.groupby(df['Risk Drivers'], sort=False).sum().rename('Cumulative Risk Index')
+
+
+# Function to sum the Weight x Risk Index of every risk driver of one workbook, without touching the frame
+def overall_risk_scores(df):
+    if not {'Risk Drivers', 'Weight', 'Risk Index'}.issubset(df.columns):
+        return pd.Series(dtype=float, name='Overall Risk')
+    products = df['Weight'] * df['Risk Index']
+    return products.groupby(df['Risk Drivers']).sum().rename('Overall Risk')
+
+
+# Function to calculate the mean and standard deviation of the Weighted Risk of each sub-driver across workbooks
+def aggregate_weighted_risk(df_all):
+    return WeightedRiskStats.from_frame(df_all, top_k=0).result()
+
+
+# Function to derive everything the views need from one workbook in a single pass: the scored frame,
+# its top_k risks, the per-driver overall scores and the partial per-sub-driver statistics
+def derive_dataset(df, top_k=TOP_K):
+    df = score_frame(df)
+    scored = 'Weighted Risk' in df.columns
+    return {
+        'df': df,
+        'top_risks': top_k_rows(df, 'Weighted Risk', top_k) if scored else df.iloc[:0],
+        'overall_scores': overall_risk_scores(df),
+        'stats': WeightedRiskStats.from_frame(df, top_k) if scored and 'Sub Risk Drivers' in df.columns else None
+    }
+
+
+# Function to describe the overall standard deviation the way the summary dashboard does
+def overall_std_comment(overall_std):
+    if overall_std <= 10:
+        return "Standard Deviation is Allowable and Understandable"
+    if overall_std <= 30:
+        return "Standard Deviation is Medium"
+    return "Standard Deviation is Higher than Average"
+
+
+# Function run in scoring workers to read and score one workbook file
+def score_workbook(path, columns=SCORING_COLUMNS):
+    start = time.perf_counter()
+    try:
+        with open(path, 'rb') as workbook_file:
+            derived = derive_dataset(read_workbook(workbook_file.read(), columns))
+    except Exception as error:
+        return {'path': str(path), 'df': None, 'stats': None, 'seconds': time.perf_counter() - start, 'error': f"{type(error).__name__}: {error}"}
+    # The partial aggregate in 'stats' is merged by the caller without re-reading the rows
+    return {'path': str(path), 'df': derived['df'], 'stats': derived['stats'], 'seconds': time.perf_counter() - start, 'error': None}
@@ -0,0 +1,117 @@
+# streaming.py
+import numpy as np
+import pandas as pd
+
+from .ranking import top_k_rows, TOP_K
+
+
+# Function to calculate the count, sum and sum of squared deviations of each group of one batch
+def batch_moments(group_codes, values, groups):
+    valid = ~np.isnan(values)
+    group_codes, values = group_codes[valid], values[valid]
+    count = np.bincount(group_codes, minlength=groups).astype(float)
+    total = np.bincount(group_codes, weights=values, minlength=groups)
+    mean = np.divide(total, count, out=np.zeros(groups), where=count > 0)
+    m2 = np.bincount(group_codes, weights=(values - mean[group_codes]) ** 2, minlength=groups)
+    return count, total, m2
+
+
+# Function to calculate the mean of each group, zero for empty groups
+def group_means(count, total):
+    return np.divide(total, count, out=np.zeros_like(total), where=count > 0)
+
+
+# Function to combine two sets of per-group moments with Chan et al.'s parallel form of Welford's update
+def merge_moments(count_a, total_a, m2_a, count_b, total_b, m2_b):
+    count = count_a + count_b
+    delta = group_means(count_b, total_b) - group_means(count_a, total_a)
+    weight_b = np.divide(count_b, count, out=np.zeros_like(count), where=count > 0)
+    m2 = m2_a + m2_b + delta ** 2 * count_a * weight_b
+    # Totals are kept instead of running means so the mean rounds exactly like pandas' sum / count
+    return count, total_a + total_b, m2
+
+
+# Online mean/standard deviation of the Weighted Risk of each sub-driver, consuming one workbook at a time.
+# Memory grows with the number of distinct sub-drivers, not with the number of workbooks, and partial
+# aggregates built in separate worker processes can be pickled and merged.
+class WeightedRiskStats:
+
+    def __init__(self, top_k=TOP_K):
+        self.top_k = top_k
+        self.workbooks = 0
+        self._positions = {}
+        self._count = np.zeros(0)
+        self._total = np.zeros(0)
+        self._m2 = np.zeros(0)
+        self._top_rows = pd.DataFrame(columns=['Sub Risk Drivers', 'Weighted Risk'])
+
+    @classmethod
+    def from_frame(cls, df, top_k=TOP_K):
+        stats = cls(top_k)
+        stats.update_frame(df)
+        return stats
+
+    def __len__(self):
+        return len(self._positions)
+
+    # Function to map sub-drivers to their slots, growing the moment arrays for new ones
+    def _slots(self, sub_drivers):
+        for sub_driver in sub_drivers:
+            if sub_driver not in self._positions:
+                self._positions[sub_driver] = len(self._positions)
+        grow = len(self._positions) - len(self._count)
+        if grow:
+            self._count, self._total, self._m2 = (np.concatenate([array, np.zeros(grow)]) for array in (self._count, self._total, self._m2))
+        return np.fromiter((self._positions[sub_driver] for sub_driver in sub_drivers), dtype=np.intp, count=len(sub_drivers))
+
+    # Function to fold per-sub-driver moments into the running totals
+    def _merge(self, sub_drivers, count, total, m2):
+        slots = self._slots(sub_drivers)
+        self._count[slots], self._total[slots], self._m2[slots] = merge_moments(
+            self._count[slots], self._total[slots], self._m2[slots], count, total, m2)
+
+    # Function to keep the top_k rows with the highest Weighted Risk, earlier rows winning ties
+    def _merge_top_rows(self, rows):
+        if self.top_k:
+            rows = pd.concat([self._top_rows, rows[['Sub Risk Drivers', 'Weighted Risk']]], ignore_index=True) if len(self._top_rows) else rows
+            self._top_rows = top_k_rows(rows, 'Weighted Risk', self.top_k).reset_index(drop=True)
+
+    # Function to add the sub-drivers and Weighted Risk of one workbook
+    def update(self, sub_drivers, weighted_risk):
+        group_codes, uniques = pd.factorize(pd.Series(sub_drivers).astype(object))
+        values = np.asarray(weighted_risk, dtype=float)
+        valid = group_codes >= 0
+        self._merge(list(uniques), *batch_moments(group_codes[valid], values[valid], len(uniques)))
+        self._merge_top_rows(pd.DataFrame({'Sub Risk Drivers': np.asarray(sub_drivers, dtype=object)[valid], 'Weighted Risk': values[valid]}))
+        self.workbooks += 1
+        return self
+
+    # Function to add one workbook frame with Sub Risk Drivers and Weighted Risk columns
+    def update_frame(self, df):
+        return self.update(df['Sub Risk Drivers'], df['Weighted Risk'])
+
+    # Function to merge the aggregate of another process or batch into this one
+    def merge(self, other):
+        if len(other):
+            sub_drivers = sorted(other._positions, key=other._positions.get)
+            self._merge(sub_drivers, other._count, other._total, other._m2)
+        self._merge_top_rows(other._top_rows)
+        self.workbooks += other.workbooks
+        return self
+
+    # Function to report the mean and sample standard deviation of each sub-driver, highest mean first
+    def result(self):
+        sub_drivers = sorted(self._positions, key=str)
+        slots = np.fromiter((self._positions[sub_driver] for sub_driver in sub_drivers), dtype=np.intp, count=len(sub_drivers))
+        count, total, m2 = self._count[slots], self._total[slots], self._m2[slots]
+        df_grouped = pd.DataFrame({
+            'Sub Risk Drivers': sub_drivers,
+            'Mean Weighted Risk': np.where(count > 0, group_means(count, total), np.nan),
+            # Sample standard deviation, undefined for sub-drivers seen once like pandas' std
+            'Standard Deviation': np.divide(m2, count - 1, out=np.full(len(count), np.nan), where=count > 1) ** 0.5
+        })
+        return df_grouped.sort_values('Mean Weighted Risk', ascending=False)
+
+    # Function to return the rows with the highest Weighted Risk seen so far
+    def top_rows(self):
+        return self._top_rows.copy()
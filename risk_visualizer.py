@@ -0,0 +1,172 @@
+# risk_visualizer.py
+# Headless entry point scoring a directory of workbooks without starting a Dash server:
+#   python risk_visualizer.py score "Risk Dashboard Files to Run" --out results
+import os
+import sys
+import html
+import argparse
+import importlib.util
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from risk_core.scoring import score_workbook, cumulative_risk_index, overall_std_comment
+from risk_core.streaming import WeightedRiskStats
+from risk_core.ranking import top_k_rows, TOP_K
+
+# Workbook formats picked up when scanning the input directory
+WORKBOOK_PATTERNS = ('*.xlsx', '*.xls', '*.csv', '*.parquet')
+
+# Number of workbooks handed to a scoring worker at a time
+SCORE_CHUNK_SIZE = 4
+
+# Number of sub-drivers listed per workbook in the report
+REPORT_TOP_K = TOP_K
+
+
+# Function to list the workbooks of a directory in a stable order, skipping Excel lock files
+def find_workbooks(directory, patterns=WORKBOOK_PATTERNS, recursive=False):
+    directory = Path(directory)
+    paths = set()
+    for pattern in patterns:
+        paths.update(directory.rglob(pattern) if recursive else directory.glob(pattern))
+    return sorted(path for path in paths if path.is_file() and not path.name.startswith('~$'))
+
+
+# Function to score workbooks with a process pool, yielding one report per workbook as soon as its turn comes
+def score_workbooks(paths, workers=None):
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(paths) < 2:
+        yield from map(score_workbook, paths)
+        return
+    with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as pool:
+        yield from pool.map(score_workbook, paths, chunksize=SCORE_CHUNK_SIZE)
+
+
+# Function to pick Parquet when a Parquet engine is installed and CSV otherwise
+def default_format():
+    if any(importlib.util.find_spec(engine) is not None for engine in ('pyarrow', 'fastparquet')):
+        return 'parquet'
+    return 'csv'
+
+
+# Function to write a results frame in the requested format
+def write_frame(df, path, file_format):
+    if file_format == 'parquet':
+        # Categorical and mixed object columns are written as plain strings
+        df.astype({column: str for column in df.columns if df[column].dtype == object}).to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+    return path
+
+
+# Function to render the static HTML report of a scoring run
+def write_report(path, scores, sub_driver_summary, driver_scores, failures):
+    import plotly.io as pio
+    from figures import bar_figure, grouped_bar_figure
+
+    sections = [f"<h1>Risk Scoring Report</h1><p>{scores['Stakeholder'].nunique() if not scores.empty else 0} workbooks scored, {len(failures)} failed.</p>"]
+
+    if not sub_driver_summary.empty:
+        overall_std = sub_driver_summary['Standard Deviation'].mean() * 100
+        master_fig = grouped_bar_figure(
+            sub_driver_summary['Sub Risk Drivers'],
+            [('Mean Weighted Risk', sub_driver_summary['Mean Weighted Risk'], 'blue'),
+             ('Standard Deviation', sub_driver_summary['Standard Deviation'], 'orange')],
+            "Master Risk Analysis", "Sub Risk Drivers", "Values", "Metrics"
+        )
+        sections.append(f"<h2>Master Chart</h2><p>Overall Standard Deviation: {overall_std:.1f}%, {overall_std_comment(overall_std)}</p>")
+        sections.append(pio.to_html(master_fig, include_plotlyjs='cdn', full_html=False))
+
+    if 'Weighted Risk' in scores.columns:
+        sections.append("<h2>Individual Assessments</h2>")
+        for stakeholder, df in scores.groupby('Stakeholder', sort=False):
+            df = df.dropna(subset=['Weighted Risk'])
+            bar_fig = bar_figure(df['Sub Risk Drivers'], df['Weighted Risk'], f"Risk Analysis for {stakeholder}",
+                                 'Sub Risk Drivers', 'Weighted Risk', marker_color=df['Color'],
+                                 xaxis={'categoryorder': 'total descending'})
+            top_risks = ''.join(f"<li>{html.escape(str(row['Sub Risk Drivers']))}: Weighted Risk Index: {row['Weighted Risk']:.1f}</li>"
+                                for _, row in top_k_rows(df, 'Weighted Risk', REPORT_TOP_K).iterrows())
+            sections.append(f"<h3>{html.escape(str(stakeholder))}</h3><ul>{top_risks}</ul>")
+            sections.append(pio.to_html(bar_fig, include_plotlyjs=False, full_html=False))
+
+    if not driver_scores.empty:
+        sections.append("<h2>Cumulative Risk Index</h2>" + driver_scores.to_html(index=False, float_format='{:.3f}'.format))
+
+    if failures:
+        sections.append("<h2>Failed Workbooks</h2><ul>" + ''.join(
+            f"<li>{html.escape(report['path'])}: {html.escape(report['error'])}</li>" for report in failures) + "</ul>")
+
+    Path(path).write_text(f"<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>Risk Scoring Report</title></head><body>{''.join(sections)}</body></html>", encoding='utf-8')
+    return path
+
+
+# Function to score every workbook of a directory and write the results and report
+def score_command(args):
+    paths = find_workbooks(args.directory, recursive=args.recursive)
+    if not paths:
+        print(f"No workbooks found in {args.directory}", file=sys.stderr)
+        return 1
+
+    scored, driver_frames, failures = [], [], []
+    risk_stats = WeightedRiskStats()
+    for report in score_workbooks(paths, args.workers):
+        if report['error']:
+            print(f"Could not score {report['path']}: {report['error']}", file=sys.stderr)
+            failures.append(report)
+            continue
+        stakeholder = Path(report['path']).name
+        print(f"Scored {stakeholder} in {report['seconds']:.2f}s")
+        scored.append(report['df'].assign(Stakeholder=stakeholder))
+        if report['stats'] is not None:
+            risk_stats.merge(report['stats'])
+        driver_scores = cumulative_risk_index(report['df'])
+        if not driver_scores.empty:
+            driver_frames.append(driver_scores.reset_index().assign(Stakeholder=stakeholder))
+
+    scores = pd.concat(scored, ignore_index=True) if scored else pd.DataFrame()
+    sub_driver_summary = risk_stats.result() if len(risk_stats) else pd.DataFrame()
+    driver_scores = pd.concat(driver_frames, ignore_index=True) if driver_frames else pd.DataFrame()
+
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+    file_format = args.format or default_format()
+    written = [write_frame(scores, out / f"scores.{file_format}", file_format)]
+    if not sub_driver_summary.empty:
+        written.append(write_frame(sub_driver_summary, out / f"sub_driver_summary.{file_format}", file_format))
+    if not driver_scores.empty:
+        written.append(write_frame(driver_scores, out / f"driver_scores.{file_format}", file_format))
+    if not args.no_report:
+        written.append(write_report(out / 'report.html', scores, sub_driver_summary, driver_scores, failures))
+
+    for path in written:
+        print(f"Wrote {path}")
+    return 1 if failures and not scored else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='risk-visualizer', description='Headless Risk Visualizer tools.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    score = subparsers.add_parser('score', help='Score every workbook of a directory and write results and an HTML report.')
+    score.add_argument('directory', help='Directory of Excel, CSV or Parquet workbooks.')
+    score.add_argument('--out', default='risk_scores', help='Output directory (default: risk_scores).')
+    score.add_argument('--format', choices=['parquet', 'csv'], help='Results format (default: parquet when a Parquet engine is installed, csv otherwise).')
+    score.add_argument('--workers', type=int, help='Number of scoring processes (default: CPU count, 1 scores serially).')
+    score.add_argument('--recursive', action='store_true', help='Also score workbooks in subdirectories.')
+    score.add_argument('--no-report', action='store_true', help='Skip the HTML report.')
+    score.set_defaults(handler=score_command)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if getattr(args, 'format', None) == 'parquet' and default_format() != 'parquet':
+        print("Parquet output needs pyarrow or fastparquet, install one or use --format csv", file=sys.stderr)
+        return 2
+    return args.handler(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
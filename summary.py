@@ -1,17 +1,57 @@
 import dash
-from dash import dcc, html, Input, Output, State, ALL, callback
+from dash import dcc, html, Input, Output, State, ALL, callback, ctx
 import dash_bootstrap_components as dbc
-import plotly.express as px
-import plotly.graph_objects as go
 import numpy as np
 import pandas as pd
-import base64
-import io
+from functools import lru_cache
 
-from utils import parse_contents
-from mitigation import mitigation_strategies
+from risk_core.parsing import parse_uploads
+from datasets import register_dataset, get_dataset, dataset_available, DATASET_CACHE_SIZE
+from risk_core.mitigation import find_strategies, NO_STRATEGY
+from figures import bar_figure, grouped_bar_figure, heatmap_figure, scatter_trace, scatter_figure, default_colorway
+from risk_core.scoring import derive_dataset, overall_std_comment
+from risk_core.streaming import WeightedRiskStats
+from risk_core.ranking import top_k_rows, top_k_by, TOP_K
+from risk_core.heatmap import build_heatmap, HEATMAP_ORDERS
+from instrumentation import instrument_app, stage
+from background import background_callback, progress_bar, cancel_button
 
-app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
+# The heatmap order selector and drill-down are created by a callback, so their callbacks are registered before they exist
+app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP], suppress_callback_exceptions=True)
+instrument_app(app)
+
+# Columns read from each uploaded workbook
+SUMMARY_COLUMNS = ['Risk Drivers', 'Sub Risk Drivers', 'Weight', 'Risk Index']
+
+# Number of entries listed by the top risk panels
+SUMMARY_TOP_K = TOP_K
+
+# Percentage of the upload progress bar filled by parsing, the slowest step, the rest is filled by scoring
+UPLOAD_PARSE_SHARE = 90
+
+# Color scale of the risk heatmaps, from low to high risk
+HEATMAP_COLORS = ['green', 'orange', 'red']
+
+# Number of combined frames and heatmaps kept for the order selector and drill-down callbacks
+HEATMAP_CACHE_SIZE = 4
+
+# Above this many points the combined scatterplot is drawn as a single WebGL trace
+SCATTERGL_THRESHOLD = 5000
+
+# Largest number of points sent to the WebGL scatterplot, larger uploads are sampled
+SCATTER_MAX_POINTS = 100000
+
+# Half-width of the horizontal jitter of WebGL points around their sub-driver, in category widths
+SCATTER_JITTER = 0.3
+
+# Diameter in pixels of the marker of the largest Weight
+SCATTER_SIZE_MAX = 20
+
+# Red, orange and green bands behind the scatterplot marking the at-risk, approaching and low risk indices
+RISK_BAND_SHAPES = [
+    {'type': 'rect', 'xref': 'paper', 'yref': 'y', 'x0': 0, 'y0': y0, 'x1': 1, 'y1': y0 + 1, 'fillcolor': fillcolor, 'line': {'width': 0}}
+    for y0, fillcolor in ((2, 'rgba(255, 0, 0, 0.1)'), (1, 'rgba(255, 165, 0, 0.1)'), (0, 'rgba(0, 128, 0, 0.1)'))
+]
 
 # Define CSS styles
 mitigation_box_style = {
@@ -34,6 +74,8 @@ app.layout = html.Div([
                     style={'width': '100%', 'height': '50px', 'lineHeight': '50px', 'margin-bottom': '20px'},
                     multiple=True
                 ),
+                progress_bar('upload-progress'),
+                cancel_button('cancel-summary'),
                 dbc.Card(id='file-list', style={'margin': '20px', 'padding': '10px'})
             ], width=12)
         ]),
@@ -42,6 +84,7 @@ app.layout = html.Div([
                 html.Div([
                     html.P("Individual Assessments:", className='h5'),
                     html.Hr(),
+                    progress_bar('assessments-progress'),
                     html.Div(id='graphs-container')
                 ], className='p-3')
             ]),
@@ -49,6 +92,7 @@ app.layout = html.Div([
                 html.Div([
                     html.P("Master Chart:", className='h5'),
                     html.Hr(),
+                    progress_bar('master-progress'),
                     html.Div(id='summary-chart-container', className='my-4 p-3', style={'backgroundColor': '#f9f9f9', 'border': '1px solid #ccc', 'borderRadius': '5px'}),
                     html.Div(id='master-chart-container', className='my-4 p-3')
                 ], className='p-3')
@@ -60,55 +104,201 @@ app.layout = html.Div([
 ])
 
 
-@app.callback(
+# Progress outputs and cancel input of the summary background jobs, only used when a background manager is available
+def summary_progress(component_id):
+    return [Output(component_id, 'value'), Output(component_id, 'label')]
+
+SUMMARY_CANCEL = [Input('cancel-summary', 'n_clicks')]
+
+@background_callback(
+    app,
     Output('data-store', 'data'),
     [Input('upload-data', 'contents'),
      State('upload-data', 'filename')],
+    progress=summary_progress('upload-progress'),
+    cancel=SUMMARY_CANCEL,
     prevent_initial_call=True
 )
-def process_data(contents, filenames):
+def process_data(set_progress, contents, filenames):
     if contents:
-        datasets = []
-        for content in contents:
-            df = parse_contents(content)
-            datasets.append(df.to_dict('records'))
-        return {'data': datasets, 'filenames': filenames}
+        set_progress((0, f"Parsing {len(contents)} files"))
+        # Parse the workbooks concurrently and keep the frames server-side, the browser only holds their dataset IDs
+        dataset_ids = []
+        parsed_filenames = []
+        overall_scores = []
+        ingest_log = []
+        reports = parse_uploads(contents, filenames, SUMMARY_COLUMNS,
+                                on_parsed=lambda done, total: set_progress((UPLOAD_PARSE_SHARE * done / total, f"Parsed {done} of {total} files")))
+        for position, report in enumerate(reports, start=1):
+            set_progress((UPLOAD_PARSE_SHARE + (100 - UPLOAD_PARSE_SHARE) * position / len(reports), f"Scoring {position} of {len(reports)} files"))
+            ingest_log.append({key: report[key] for key in ('filename', 'seconds', 'cached', 'error')})
+            if report['error']:
+                print(f"Could not parse {report['filename']}: {report['error']}")
+                continue
+            dataset_id = register_dataset(report['df'], report['key'])
+            dataset_ids.append(dataset_id)
+            parsed_filenames.append(report['filename'])
+            # Deriving here warms the cache every view reads, the per-driver scores are a handful of numbers kept in the browser
+            with stage('derive'):
+                scores = derived_dataset(dataset_id)['overall_scores']
+            overall_scores.append({'drivers': scores.index.tolist(), 'scores': scores.tolist()})
+        return {'datasets': dataset_ids, 'filenames': parsed_filenames, 'overall_scores': overall_scores, 'ingest': ingest_log}
     return {}
 
-@app.callback(
+# Function to derive the scored frame, top risks, overall scores and sub-driver statistics of a dataset once per process,
+# callers must not modify the result
+@lru_cache(maxsize=DATASET_CACHE_SIZE)
+def derived_dataset(dataset_id):
+    return derive_dataset(get_dataset(dataset_id), SUMMARY_TOP_K)
+
+# Function to fetch the derived datasets referenced by the store one at a time, skipping any that have expired,
+# views report those with missing_datasets_alert
+def iter_datasets(stored_data):
+    for dataset_id, filename in zip(stored_data['datasets'], stored_data['filenames']):
+        try:
+            yield derived_dataset(dataset_id), filename
+        except KeyError:
+            continue
+
+# Function to warn that some uploaded files can no longer be read and are left out of a view, None when all are available
+def missing_datasets_alert(stored_data):
+    missing = [filename for dataset_id, filename in zip(stored_data['datasets'], stored_data['filenames'])
+               if not dataset_available(dataset_id)]
+    if not missing:
+        return None
+    return dbc.Alert(f"{len(missing)} of {len(stored_data['datasets'])} uploaded files are no longer available and are left out, please upload them again: "
+                     f"{', '.join(missing)}", color='warning')
+
+# Function to fetch every derived dataset referenced by the store
+def load_datasets(stored_data):
+    return list(iter_datasets(stored_data))
+
+# Function to concatenate every dataset once into a frame tagged by Stakeholder
+def build_combined_frame(datasets):
+    if not datasets:
+        return pd.DataFrame()
+    combined_df = pd.concat([df.assign(Stakeholder=filename) for df, filename in datasets], ignore_index=True)
+    # Repeated labels are stored once as categories instead of once per row, stakeholders keep the upload order
+    combined_df['Stakeholder'] = pd.Categorical(combined_df['Stakeholder'], categories=pd.unique(pd.Series([filename for _, filename in datasets])))
+    if 'Sub Risk Drivers' in combined_df.columns:
+        combined_df['Sub Risk Drivers'] = combined_df['Sub Risk Drivers'].astype('category')
+    return combined_df
+
+# Function to build the combined frame of an upload once for every callback reading it, callers must not modify it
+@lru_cache(maxsize=HEATMAP_CACHE_SIZE)
+def cached_combined_frame(dataset_ids, filenames):
+    derived = load_datasets({'datasets': list(dataset_ids), 'filenames': list(filenames)})
+    return build_combined_frame([(dataset['df'], filename) for dataset, filename in derived])
+
+# Function to bin and order the Stakeholder x Sub Risk Drivers heatmap of a combined frame from its category codes
+def create_heatmap(combined_df, order='none', title="Heatmap of Risk Assessments"):
+    heatmap = build_heatmap(
+        combined_df['Stakeholder'].cat.codes, combined_df['Sub Risk Drivers'].cat.codes, combined_df['Risk Index'],
+        combined_df['Stakeholder'].cat.categories, combined_df['Sub Risk Drivers'].cat.categories, order
+    )
+    if heatmap['binned']:
+        title = f"{title} (binned, click a cell to drill down)"
+    figure = heatmap_figure(heatmap['z'], heatmap['x'], heatmap['y'], title, 'Sub Risk Drivers', 'Stakeholder',
+                            HEATMAP_COLORS, customdata=heatmap['count'] if heatmap['binned'] else None)
+    return figure, heatmap
+
+# Function to find the largest Weight of the whole upload, which every trace is sized against
+def largest_weight(weights):
+    weights = np.asarray(weights, dtype=float)
+    return np.nanmax(weights) if np.isfinite(weights).any() else 0
+
+# Function to size scatter markers by Weight the way plotly.express does, the largest Weight of the upload SCATTER_SIZE_MAX pixels wide
+def weight_marker(weights, largest, **marker):
+    weights = np.asarray(weights, dtype=float)
+    return {'size': weights, 'sizemode': 'area', 'sizeref': 2.0 * largest / SCATTER_SIZE_MAX ** 2 if largest > 0 else 1, 'opacity': 0.8, **marker}
+
+# Function to build the combined scatterplot, one SVG trace per stakeholder or a single WebGL trace for large uploads
+def create_scatter(combined_df):
+    title = "Combined Risk Assessment Scatterplot"
+    layout = {'shapes': RISK_BAND_SHAPES}
+    stakeholders = combined_df['Stakeholder'].cat
+    weights = combined_df['Weight'] if 'Weight' in combined_df.columns else pd.Series(1.0, index=combined_df.index)
+    # One size reference for every trace, so bubbles compare across stakeholders
+    largest = largest_weight(weights)
+
+    if len(combined_df) <= SCATTERGL_THRESHOLD:
+        colorway = default_colorway()
+        traces = []
+        for code, stakeholder in enumerate(stakeholders.categories):
+            rows = (stakeholders.codes == code).to_numpy()
+            if not rows.any():
+                continue
+            traces.append(scatter_trace(
+                combined_df['Sub Risk Drivers'].to_numpy()[rows], combined_df['Risk Index'].to_numpy()[rows],
+                weight_marker(weights.to_numpy()[rows], largest, color=colorway[len(traces) % len(colorway)]),
+                name=stakeholder, legendgroup=stakeholder,
+                hovertemplate=f"Stakeholder={stakeholder}<br>Sub Risk Drivers=%{{x}}<br>Risk Index=%{{y}}<br>Weight=%{{marker.size}}<extra></extra>"
+            ))
+        return scatter_figure(traces, title, "Sub Risk Drivers", "Risk Index", "Stakeholder", **layout)
+
+    # Past the SVG threshold, keep a reproducible sample of at most SCATTER_MAX_POINTS points
+    positions = np.arange(len(combined_df))
+    if len(positions) > SCATTER_MAX_POINTS:
+        positions = np.sort(np.random.default_rng(0).choice(positions, SCATTER_MAX_POINTS, replace=False))
+        title = f"{title} ({SCATTER_MAX_POINTS:,} of {len(combined_df):,} assessments sampled)"
+
+    # Sub-drivers become numeric positions with a small deterministic jitter, so stacked assessments stay visible
+    sub_drivers = combined_df['Sub Risk Drivers'].cat
+    x = sub_drivers.codes.to_numpy()[positions] + np.random.default_rng(1).uniform(-SCATTER_JITTER, SCATTER_JITTER, len(positions))
+    stakeholder_codes = stakeholders.codes.to_numpy()[positions]
+    trace = scatter_trace(
+        x, combined_df['Risk Index'].to_numpy()[positions],
+        weight_marker(weights.to_numpy()[positions], largest, color=stakeholder_codes, colorscale='Turbo', showscale=False),
+        gl=True, showlegend=False,
+        customdata=np.column_stack([np.asarray(stakeholders.categories, dtype=object)[stakeholder_codes],
+                                    np.asarray(sub_drivers.categories, dtype=object)[sub_drivers.codes.to_numpy()[positions]]]),
+        hovertemplate="Stakeholder=%{customdata[0]}<br>Sub Risk Drivers=%{customdata[1]}<br>Risk Index=%{y}<br>Weight=%{marker.size}<extra></extra>"
+    )
+    layout['xaxis'] = {'tickmode': 'array', 'tickvals': list(range(len(sub_drivers.categories))), 'ticktext': list(sub_drivers.categories)}
+    return scatter_figure([trace], title, "Sub Risk Drivers", "Risk Index", "Stakeholder", **layout)
+
+# Function to get the cached heatmap of the uploaded datasets in the given row order
+@lru_cache(maxsize=HEATMAP_CACHE_SIZE)
+def cached_heatmap(dataset_ids, filenames, order):
+    return create_heatmap(cached_combined_frame(dataset_ids, filenames), order)
+
+@background_callback(
+    app,
     Output('graphs-container', 'children'),
     Input('data-store', 'data'),
+    progress=summary_progress('assessments-progress'),
+    cancel=SUMMARY_CANCEL,
     prevent_initial_call=True
 )
-def update_individual_assessments(stored_data):
-    if stored_data and 'data' in stored_data and 'filenames' in stored_data:
-        data = stored_data['data']
-        filenames = stored_data['filenames']
-        combined_df = pd.DataFrame()
+def update_individual_assessments(set_progress, stored_data):
+    if stored_data and 'datasets' in stored_data and 'filenames' in stored_data:
+        with stage('load'):
+            datasets = []
+            for dataset in iter_datasets(stored_data):
+                datasets.append(dataset)
+                set_progress((50 * len(datasets) / len(stored_data['datasets']), f"Loaded {len(datasets)} of {len(stored_data['datasets'])} files"))
+            upload_key = tuple(stored_data['datasets']), tuple(stored_data['filenames'])
+            combined_df = cached_combined_frame(*upload_key)
+        missing_alert = missing_datasets_alert(stored_data)
+        if not datasets:
+            return [missing_alert or html.Div("No data available for scatter plot.")]
         individual_figures = []
 
-        for df_data, filename in zip(data, filenames):
-            df = pd.DataFrame(df_data)
-            df['Stakeholder'] = filename
-            combined_df = pd.concat([combined_df, df])
-
-            if 'Weight' in df.columns and 'Risk Index' in df.columns:
-                df['Weighted Risk'] = df['Weight'] * df['Risk Index']
-                df.sort_values('Weighted Risk', ascending=False, inplace=True)  # Sort by 'Weighted Risk' in descending order
-
-                # Define color based on the specified ranges for Weighted Risk
-                df['Color'] = df['Weighted Risk'].apply(
-                    lambda x: 'green' if x <= 1 else 'orange' if 1 < x <= 2 else 'red')
-
-                bar_fig = px.bar(df, x='Sub Risk Drivers', y='Weighted Risk', color='Color', title=f"Risk Analysis for {filename}")
-                bar_fig.update_traces(marker=dict(color=df['Color']))  # Update bar colors
-                bar_fig.update_layout(xaxis={'categoryorder': 'total descending'})  # Sort bars in descending order
-
-                # Summary box for top 5 risks
-                top_5_risks = df.nlargest(5, 'Weighted Risk')
+        for dataset, filename in datasets:
+            df = dataset['df']
+            # Weighted Risk, its color band and the top risks were derived once for the upload
+            if 'Weighted Risk' in df.columns:
+                # One bar per sub-driver, colored by its band and ordered by Plotly in descending order
+                with stage('figures'):
+                    bar_fig = bar_figure(df['Sub Risk Drivers'], df['Weighted Risk'], f"Risk Analysis for {filename}",
+                                         'Sub Risk Drivers', 'Weighted Risk', marker_color=df['Color'],
+                                         xaxis={'categoryorder': 'total descending'})
+
+                # Summary box for top risks
+                top_risks = dataset['top_risks']
                 summary = html.Div([
-                    html.H5(f"Top 5 Largest Risks for {filename}:"),
-                    html.Ul([html.Li(f"{row['Sub Risk Drivers']}: Weighted Risk Index: {row['Weighted Risk']:.1f}") for _, row in top_5_risks.iterrows()])
+                    html.H5(f"Top {SUMMARY_TOP_K} Largest Risks for {filename}:"),
+                    html.Ul([html.Li(f"{row['Sub Risk Drivers']}: Weighted Risk Index: {row['Weighted Risk']:.1f}") for _, row in top_risks.iterrows()])
                 ], style={'padding': '10px', 'backgroundColor': '#f9f9f9', 'border': '1px solid #ccc', 'borderRadius': '5px', 'margin': '10px 0'})
 
                 individual_figures.append(html.Div([
@@ -119,75 +309,41 @@ def update_individual_assessments(stored_data):
                     html.Hr()  # Divider after each file's assessment and mitigation plan
                 ], className='mb-3'))
 
+        set_progress((75, "Building the heatmap and scatterplot"))
+
         # Heatmap for combined data
-        heatmap_data = combined_df.pivot_table(values='Risk Index', index='Stakeholder', columns='Sub Risk Drivers')
-        heatmap_fig = px.imshow(heatmap_data, aspect='auto', title="Heatmap of Risk Assessments", color_continuous_scale=['green', 'orange', 'red'])
+        # Built from category codes and binned server-side, so the browser never receives more than the capped matrix
+        with stage('figures'):
+            heatmap_fig, _ = cached_heatmap(*upload_key, 'none')
 
-        # Summary box for heatmap top 5 risks
-        top_5_heatmap_risks = combined_df.nlargest(5, 'Risk Index')
+        # Summary box for heatmap top risks
+        top_heatmap_risks = top_k_rows(combined_df, 'Risk Index', SUMMARY_TOP_K)
         heatmap_summary = html.Div([
-            html.H5("Top 5 Largest Collective Risks Areas:"),
-            html.Ul([html.Li(f"{row['Sub Risk Drivers']}: Risk Index: {row['Risk Index']:.1f}") for _, row in top_5_heatmap_risks.iterrows()])
+            html.H5(f"Top {SUMMARY_TOP_K} Largest Collective Risks Areas:"),
+            html.Ul([html.Li(f"{row['Sub Risk Drivers']}: Risk Index: {row['Risk Index']:.1f}") for _, row in top_heatmap_risks.iterrows()])
         ], style={'padding': '10px', 'backgroundColor': '#f9f9f9', 'border': '1px solid #ccc', 'borderRadius': '5px', 'margin': '10px 0'})
 
-        # Scatterplot for combined data
-        scatter_fig = px.scatter(combined_df, 
-                                 x='Sub Risk Drivers', 
-                                 y='Risk Index', 
-                                 color='Stakeholder', 
-                                 size='Weight', 
-                                 title="Combined Risk Assessment Scatterplot",
-                                 labels={"Risk Index": "Risk Index (Higher is worse)"})  # Add label for y-axis
-
-        scatter_fig.update_layout(
-            title="Combined Risk Assessment Scatterplot",
-            xaxis_title="Sub Risk Drivers",
-            yaxis_title="Risk Index",
-            legend_title="Stakeholder",
-            shapes=[
-                dict(
-                    type='rect',
-                    xref='paper',
-                    yref='y',
-                    x0=0,
-                    y0=2,
-                    x1=1,
-                    y1=3,
-                    fillcolor='rgba(255, 0, 0, 0.1)',
-                    line=dict(width=0)
-                ),
-                dict(
-                    type='rect',
-                    xref='paper',
-                    yref='y',
-                    x0=0,
-                    y0=1,
-                    x1=1,
-                    y1=2,
-                    fillcolor='rgba(255, 165, 0, 0.1)',
-                    line=dict(width=0)
-                ),
-                dict(
-                    type='rect',
-                    xref='paper',
-                    yref='y',
-                    x0=0,
-                    y0=0,
-                    x1=1,
-                    y1=1,
-                    fillcolor='rgba(0, 128, 0, 0.1)',
-                    line=dict(width=0)
-                )
-            ]
-        )
-        scatter_fig.update_traces(marker=dict(opacity=0.8), selector=dict(mode='markers'))
+        # Scatterplot for combined data, drawn with WebGL once it has too many points for SVG
+        with stage('figures'):
+            scatter_fig = create_scatter(combined_df)
+        set_progress((100, "Done"))
 
         return [
+            missing_alert,
             html.Div([
                 html.Hr(),
                 html.H4("Heatmap and Scatterplot", className='mt-4'),
                 html.P("Heatmap of Risk Assessments:"),
-                dcc.Graph(figure=heatmap_fig),
+                dcc.RadioItems(
+                    id='heatmap-order',
+                    options=[{'label': 'File order', 'value': 'none'}, {'label': 'Highest mean first', 'value': 'mean'},
+                             {'label': 'Cluster similar stakeholders', 'value': 'cluster'}],
+                    value='none',
+                    inline=True,
+                    inputStyle={'margin-right': '5px', 'margin-left': '15px'}
+                ),
+                dcc.Graph(id='heatmap-graph', figure=heatmap_fig),
+                html.Div(id='heatmap-drilldown'),
                 heatmap_summary,
                 html.Hr(),
                 html.P("Combined Scatterplot:"),
@@ -200,86 +356,108 @@ def update_individual_assessments(stored_data):
 
 
 @app.callback(
+    Output('heatmap-graph', 'figure'),
+    Input('heatmap-order', 'value'),
+    State('data-store', 'data'),
+    prevent_initial_call=True
+)
+def update_heatmap_order(order, stored_data):
+    if not stored_data or order not in HEATMAP_ORDERS:
+        return dash.no_update
+    return cached_heatmap(tuple(stored_data['datasets']), tuple(stored_data['filenames']), order)[0]
+
+
+@app.callback(
+    Output('heatmap-drilldown', 'children'),
+    Input('heatmap-graph', 'clickData'),
+    State('heatmap-order', 'value'),
+    State('data-store', 'data'),
+    prevent_initial_call=True
+)
+def drill_down_heatmap(click_data, order, stored_data):
+    if not click_data or not stored_data:
+        return dash.no_update
+    upload_key = tuple(stored_data['datasets']), tuple(stored_data['filenames'])
+    combined_df = cached_combined_frame(*upload_key)
+    _, heatmap = cached_heatmap(*upload_key, order if order in HEATMAP_ORDERS else 'none')
+
+    point = click_data['points'][0]
+    try:
+        row_bin = heatmap['row_bins'][heatmap['y'].index(str(point['y']))]
+        col_bin = heatmap['col_bins'][heatmap['x'].index(str(point['x']))]
+    except ValueError:
+        return html.Div("The heatmap has changed, click the cell again.")
+
+    # Rows of the clicked bin, re-binned on their own so the drill-down is capped like the overview
+    in_bin = combined_df['Stakeholder'].cat.codes.isin(row_bin) & combined_df['Sub Risk Drivers'].cat.codes.isin(col_bin)
+    bin_df = combined_df[in_bin].copy()
+    if bin_df.empty:
+        return html.Div(f"No assessments in {point['y']} × {point['x']}.")
+    for column in ('Stakeholder', 'Sub Risk Drivers'):
+        bin_df[column] = bin_df[column].cat.remove_unused_categories()
+
+    if len(row_bin) == 1 and len(col_bin) == 1:
+        return html.Div([
+            html.H5(f"{point['y']} × {point['x']}"),
+            html.Ul([html.Li(f"Risk Index: {row['Risk Index']}, Weight: {row.get('Weight', 'n/a')}") for _, row in bin_df.iterrows()])
+        ], style={'padding': '10px', 'backgroundColor': '#f9f9f9', 'border': '1px solid #ccc', 'borderRadius': '5px', 'margin': '10px 0'})
+
+    bin_fig, _ = create_heatmap(bin_df, order, title=f"Drill-down: {point['y']} × {point['x']}")
+    return dcc.Graph(figure=bin_fig)
+
+
+@background_callback(
+    app,
     [Output('summary-chart-container', 'children'),
      Output('master-chart-container', 'children'),
      Output('mitigation-container', 'children')],
     Input('data-store', 'data'),
+    progress=summary_progress('master-progress'),
+    cancel=SUMMARY_CANCEL,
     prevent_initial_call=True
 )
-def update_master_chart(stored_data):
-    if stored_data and 'data' in stored_data and 'filenames' in stored_data:
-        data = stored_data['data']
-        filenames = stored_data['filenames']
-        dfs_with_risk = []
-
-        for df_data, filename in zip(data, filenames):
-            df = pd.DataFrame(df_data)
-            
-            # Ensure required columns are present
-            if {'Weight', 'Risk Index', 'Sub Risk Drivers'}.issubset(df.columns):
-                # Calculate Weighted Risk
-                df['Weighted Risk'] = df['Weight'] * df['Risk Index']
-                dfs_with_risk.append(df)
+def update_master_chart(set_progress, stored_data):
+    if stored_data and 'datasets' in stored_data and 'filenames' in stored_data:
+        # Workbooks are merged one at a time, so memory only grows with the number of sub-drivers
+        risk_stats = WeightedRiskStats(SUMMARY_TOP_K)
+
+        for position, (dataset, filename) in enumerate(iter_datasets(stored_data), start=1):
+            set_progress((100 * position / len(stored_data['datasets']), f"Merging {position} of {len(stored_data['datasets'])} files"))
+            # Each workbook's statistics were derived once for the upload, only the merge happens here
+            if dataset['stats'] is not None:
+                with stage('aggregate'):
+                    risk_stats.merge(dataset['stats'])
             else:
                 print(f"Required columns are missing in file: {filename}")
 
-        if dfs_with_risk:
-            df_all = pd.concat(dfs_with_risk)
-            df_all.sort_values('Weighted Risk', ascending=False, inplace=True)
-
-            if not df_all.empty:
-                df_grouped = df_all.groupby('Sub Risk Drivers')['Weighted Risk'].agg(['mean', 'std']).reset_index()
-                df_grouped.columns = ['Sub Risk Drivers', 'Mean Weighted Risk', 'Standard Deviation']
+        if risk_stats.workbooks:
+            if len(risk_stats):
+                df_grouped = risk_stats.result()
                 
-                df_grouped.sort_values('Mean Weighted Risk', ascending=False, inplace=True)
-                
-                master_fig = go.Figure()
-                master_fig.add_trace(go.Bar(
-                    x=df_grouped['Sub Risk Drivers'],
-                    y=df_grouped['Mean Weighted Risk'],
-                    name='Mean Weighted Risk',
-                    marker_color='blue'
-                ))
-                
-                master_fig.add_trace(go.Bar(
-                    x=df_grouped['Sub Risk Drivers'],
-                    y=df_grouped['Standard Deviation'],
-                    name='Standard Deviation',
-                    marker_color='orange'
-                ))
-                
-                master_fig.update_layout(
-                    title="Master Risk Analysis",
-                    barmode='group',
-                    xaxis_title="Sub Risk Drivers",
-                    yaxis_title="Values",
-                    legend_title="Metrics"
+                master_fig = grouped_bar_figure(
+                    df_grouped['Sub Risk Drivers'],
+                    [('Mean Weighted Risk', df_grouped['Mean Weighted Risk'], 'blue'),
+                     ('Standard Deviation', df_grouped['Standard Deviation'], 'orange')],
+                    "Master Risk Analysis", "Sub Risk Drivers", "Values", "Metrics"
                 )
                 
                 master_chart = dcc.Graph(figure=master_fig)
 
-                top_5_risks = df_grouped.nlargest(5, 'Mean Weighted Risk')
-                top_5_std = df_grouped.nlargest(5, 'Standard Deviation')
+                top_ranked = top_k_by(df_grouped, ['Mean Weighted Risk', 'Standard Deviation'], SUMMARY_TOP_K)
                 overall_std = df_grouped['Standard Deviation'].mean() * 100
-                
-                if overall_std <= 10:
-                    std_comment = "Standard Deviation is Allowable and Understandable"
-                elif 10 < overall_std <= 30:
-                    std_comment = "Standard Deviation is Medium"
-                else:
-                    std_comment = "Standard Deviation is Higher than Average"
+                std_comment = overall_std_comment(overall_std)
 
                 summary_chart = html.Div([
                     html.H5("Summary Statistics:"),
                     html.P([
-                        html.B("Top 5 Sub Risk Categories with Greatest Risk:"),
+                        html.B(f"Top {SUMMARY_TOP_K} Sub Risk Categories with Greatest Risk:"),
                         html.Br(),
-                        ', '.join(top_5_risks['Sub Risk Drivers'])
+                        ', '.join(top_ranked['Mean Weighted Risk']['Sub Risk Drivers'])
                     ]),
                     html.P([
-                        html.B("Top 5 Sub Risk Categories with Greatest Standard Deviation:"),
+                        html.B(f"Top {SUMMARY_TOP_K} Sub Risk Categories with Greatest Standard Deviation:"),
                         html.Br(),
-                        ', '.join(top_5_std['Sub Risk Drivers'])
+                        ', '.join(top_ranked['Standard Deviation']['Sub Risk Drivers'])
                     ]),
                     html.P([
                         html.B("Overall Standard Deviation:"),
@@ -288,12 +466,12 @@ def update_master_chart(stored_data):
                     ])
                 ], style={'padding': '20px', 'backgroundColor': '#f9f9f9', 'border': '1px solid #ccc', 'borderRadius': '5px', 'margin': '10px 0'})
 
-                master_top_risks = df_all.nlargest(5, 'Weighted Risk')
+                master_top_risks = risk_stats.top_rows()
                 master_mitigation = [html.H5("Mitigation Strategies for Master Chart")]
                 master_mitigation.extend([
                     html.Div([
                         html.H6(risk['Sub Risk Drivers']),
-                        html.Ul([html.Li(s) for s in mitigation_strategies.get(risk['Sub Risk Drivers'], ["No specific mitigation strategy provided."])])
+                        html.Ul([html.Li(s) for s in find_strategies(risk['Sub Risk Drivers']) or [NO_STRATEGY]])
                     ], style=mitigation_box_style) for _, risk in master_top_risks.iterrows()
                 ])
             else:
@@ -305,6 +483,9 @@ def update_master_chart(stored_data):
             summary_chart = html.Div("No data available for Summary Chart.")
             master_mitigation = [html.Div("No data with 'Weighted Risk' found to analyze mitigation strategies.")]
 
+        missing_alert = missing_datasets_alert(stored_data)
+        if missing_alert is not None:
+            summary_chart = html.Div([missing_alert, summary_chart])
         return summary_chart, master_chart, html.Div(master_mitigation)
     return html.Div("No file uploaded."), html.Div(), html.Div()
 
@@ -312,55 +493,54 @@ def update_master_chart(stored_data):
 
 @app.callback(
     Output('file-list', 'children'),
-    Input('upload-data', 'contents'),
-    State('upload-data', 'filename'),
+    Input('data-store', 'data'),
     prevent_initial_call=True
 )
-def update_file_list(list_of_contents, list_of_names):
-    if list_of_contents:
-        file_items = [html.Li(filename) for filename in list_of_names]
+def update_file_list(stored_data):
+    if stored_data and stored_data.get('ingest'):
+        file_items = []
+        # Buttons are indexed by position among the parsed files, the order of stored_data['datasets']
+        file_index = 0
+        for entry in stored_data['ingest']:
+            if entry['error']:
+                file_items.append(html.Li(f"{entry['filename']} (failed: {entry['error']})", style={'color': 'red'}))
+                continue
+            status = "cached" if entry['cached'] else f"parsed in {entry['seconds']:.2f}s"
+            file_items.append(html.Li([
+                f"{entry['filename']} ({status}) ",
+                html.Button('View Summary', id={'type': 'file-button', 'index': file_index}, className='btn btn-link btn-sm')
+            ]))
+            file_index += 1
         return dbc.Card(dbc.CardBody([html.H4("Uploaded Files"), html.Ul(file_items)]), color="light", outline=True)
     return "No files uploaded."
 
 
-def calculate_overall_risk_evaluation(dataframe):
-    dataframe['Weighted Risk'] = dataframe['Weight'] * dataframe['Risk Index']
-    overall_risk_scores = dataframe.groupby('Risk Drivers')['Weighted Risk'].sum()
-    return overall_risk_scores
-
-
-
-
 @app.callback(
     Output('summary-output', 'children'),
     Input({'type': 'file-button', 'index': ALL}, 'n_clicks'),
-    State('upload-data', 'contents'),
-    State('upload-data', 'filename'),
+    State('data-store', 'data'),
     prevent_initial_call=True
 )
-def display_summary(n_clicks, list_of_contents, list_of_filenames):
-    ctx = dash.callback_context
-    if not ctx.triggered:
+def display_summary(n_clicks, stored_data):
+    # Re-rendering the file list creates fresh buttons, which trigger the callback without a click
+    if not ctx.triggered_id or not any(n_clicks):
+        return dash.no_update
+    file_index = ctx.triggered_id['index']
+    if not stored_data or file_index >= len(stored_data.get('overall_scores', [])):
         return "Select a file to view the summary."
-    else:
-        button_id = ctx.triggered[0]['prop_id'].split('.')[0]
-        file_index = eval(button_id)['index']
-        content_type, content_string = list_of_contents[file_index].split(',')
-        decoded = base64.b64decode(content_string)
-        df = pd.read_excel(io.BytesIO(decoded))
-        overall_scores = calculate_overall_risk_evaluation(df)
-        
-        return html.Div([
-           html.Br(),
-            html.H5(f"Summary for {list_of_filenames[file_index]}"),
-            dcc.Graph(
-                figure={
-                    'data': [{'x': overall_scores.index, 'y': overall_scores.values, 'type': 'bar'}],
-                    'layout': {'title': 'Risk Evaluation Scores'}
-                }
-            ),
-            html.Br()
-        ])
+    overall_scores = stored_data['overall_scores'][file_index]
+
+    return html.Div([
+        html.Br(),
+        html.H5(f"Summary for {stored_data['filenames'][file_index]}"),
+        dcc.Graph(
+            figure={
+                'data': [{'x': overall_scores['drivers'], 'y': overall_scores['scores'], 'type': 'bar'}],
+                'layout': {'title': 'Risk Evaluation Scores'}
+            }
+        ),
+        html.Br()
+    ])
 
 
 if __name__ == '__main__':